@@ -0,0 +1,127 @@
+from datetime import datetime
+
+
+STARS = range(1, 6)
+
+# Events rated before rating_sum existed only kept a rounded average
+LEGACY_RATING_SUM = {"$multiply": [{"$ifNull": ["$average_rating", 0]}, {"$ifNull": ["$total_ratings", 0]}]}
+
+
+def student_dashboard_pipeline(student_id: str, now: datetime) -> list:
+    """All four StudentDashboard counters in one round-trip.
+
+    Each registration is joined to its event through the unique ``id`` index;
+    only the event date is needed, to count upcoming unattended events.
+    """
+    return [
+        {"$match": {"student_id": student_id}},
+        {"$lookup": {"from": "events", "localField": "event_id", "foreignField": "id", "as": "event"}},
+        {"$group": {
+            "_id": None,
+            "total_events_registered": {"$sum": 1},
+            "attended_events": {"$sum": {"$cond": ["$attendance_marked", 1, 0]}},
+            "certificates_earned": {"$sum": {"$cond": ["$certificate_issued", 1, 0]}},
+            "upcoming_events": {"$sum": {"$cond": [
+                {"$and": [
+                    {"$ne": ["$attendance_marked", True]},
+                    {"$gt": [{"$max": "$event.date"}, now]},
+                ]},
+                1,
+                0,
+            ]}},
+        }},
+        {"$project": {"_id": 0}},
+    ]
+
+
+def organizer_analytics_pipeline(organizer_id: str, now: datetime, top: int = 5) -> list:
+    """Every OrganizerAnalytics input for one organizer in a single aggregation.
+
+    Attendee counts are looked up per event against the
+    ``(event_id, attendance_marked)`` index on registrations.
+    """
+    return [
+        {"$match": {"organizer_id": organizer_id}},
+        {"$project": {
+            "_id": 0, "id": 1, "title": 1, "date": 1,
+            "current_registrations": {"$ifNull": ["$current_registrations", 0]},
+            "average_rating": {"$ifNull": ["$average_rating", 0]},
+            "rating_sum": {"$ifNull": ["$rating_sum", LEGACY_RATING_SUM]},
+            "rating_count": {"$ifNull": ["$rating_count", {"$ifNull": ["$total_ratings", 0]}]},
+        }},
+        {"$facet": {
+            "summary": [
+                {"$lookup": {
+                    "from": "registrations",
+                    "let": {"event_id": "$id"},
+                    "pipeline": [
+                        {"$match": {"$expr": {"$eq": ["$event_id", "$$event_id"]}, "attendance_marked": True}},
+                        {"$count": "n"},
+                    ],
+                    "as": "attendees",
+                }},
+                {"$group": {
+                    "_id": None,
+                    "total_events": {"$sum": 1},
+                    "total_registrations": {"$sum": "$current_registrations"},
+                    "total_attendees": {"$sum": {"$ifNull": [{"$arrayElemAt": ["$attendees.n", 0]}, 0]}},
+                    "upcoming_events": {"$sum": {"$cond": [{"$gt": ["$date", now]}, 1, 0]}},
+                    "rating_sum": {"$sum": "$rating_sum"},
+                    "rating_count": {"$sum": "$rating_count"},
+                }},
+            ],
+            "top_events": [
+                {"$sort": {"current_registrations": -1}},
+                {"$limit": top},
+                {"$project": {
+                    "id": 1, "title": 1,
+                    "registrations": "$current_registrations",
+                    "rating": "$average_rating",
+                }},
+            ],
+        }},
+    ]
+
+
+def add_rating_update(rating: int) -> list:
+    """Pipeline update folding one new rating into the event's aggregates.
+
+    Constant time regardless of how many ratings the event already has;
+    ``database/repair_ratings.py`` rebuilds the same fields from ``ratings``.
+    """
+    star = f"rating_histogram.{rating}"
+    return [
+        {"$set": {
+            "rating_sum": {"$add": [{"$ifNull": ["$rating_sum", LEGACY_RATING_SUM]}, rating]},
+            "rating_count": {"$add": [{"$ifNull": ["$rating_count", {"$ifNull": ["$total_ratings", 0]}]}, 1]},
+            star: {"$add": [{"$ifNull": [f"${star}", 0]}, 1]},
+        }},
+        {"$set": {
+            "total_ratings": "$rating_count",
+            "average_rating": {"$round": [{"$divide": ["$rating_sum", "$rating_count"]}, 2]},
+        }},
+    ]
+
+
+def rating_aggregates_pipeline() -> list:
+    """Per-event rating sum, count and star histogram rebuilt from ``ratings``"""
+    return [
+        {"$group": {
+            "_id": "$event_id",
+            "rating_sum": {"$sum": "$rating"},
+            "rating_count": {"$sum": 1},
+            **{f"star_{star}": {"$sum": {"$cond": [{"$eq": ["$rating", star]}, 1, 0]}} for star in STARS},
+        }},
+    ]
+
+
+def rating_aggregates_fields(group: dict) -> dict:
+    """Event fields to ``$set`` for one rating_aggregates_pipeline result"""
+    count = group.get("rating_count", 0)
+    return {
+        "rating_sum": group.get("rating_sum", 0),
+        "rating_count": count,
+        "rating_histogram": {str(star): group.get(f"star_{star}", 0) for star in STARS},
+        "total_ratings": count,
+        "average_rating": round(group["rating_sum"] / count, 2) if count else 0.0,
+    }
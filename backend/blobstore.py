@@ -0,0 +1,273 @@
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import AsyncIterator, Optional, Tuple
+from fastapi import HTTPException, Request, status
+from fastapi.responses import Response, StreamingResponse
+from motor.motor_asyncio import AsyncIOMotorGridFSBucket
+from pathlib import Path
+import asyncio
+import base64
+import binascii
+import hashlib
+import os
+import re
+import uuid
+
+BLOB_STORE_BACKEND = os.environ.get('BLOB_STORE_BACKEND', 'gridfs')  # "gridfs" or "filesystem"
+BLOB_STORE_PATH = os.environ.get('BLOB_STORE_PATH', str(Path(__file__).parent / 'blobs'))
+CHUNK_SIZE = 256 * 1024
+
+
+def blob_key(data: bytes) -> str:
+    """Content address of ``data``; identical bodies share one stored blob"""
+    return hashlib.sha256(data).hexdigest()
+
+
+def decode_base64_blob(value: str) -> Tuple[bytes, str]:
+    """Decode a base64 string or data URI into (bytes, content type)"""
+    content_type = None
+    if value.startswith("data:"):
+        header, _, value = value.partition(",")
+        content_type = header[5:].split(";")[0] or None
+    try:
+        data = base64.b64decode(value, validate=True)
+    except (binascii.Error, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid base64 data")
+
+    if content_type is None:
+        if data.startswith(b"\x89PNG"):
+            content_type = "image/png"
+        elif data.startswith(b"\xff\xd8"):
+            content_type = "image/jpeg"
+        elif data.startswith(b"%PDF"):
+            content_type = "application/pdf"
+        else:
+            content_type = "application/octet-stream"
+    return data, content_type
+
+
+class BlobStore(ABC):
+    """Content-addressed binary storage for event images and certificate PDFs.
+
+    Blobs are shared by every document with the same content, so they are
+    never deleted along with a document; ``database/gc_blobs.py`` removes
+    the unreferenced ones. ``put`` of an existing blob refreshes its stored
+    time, which the collector re-checks before deleting.
+    """
+
+    @abstractmethod
+    async def put(self, data: bytes) -> str:
+        """Store ``data`` and return its key"""
+
+    @abstractmethod
+    async def size(self, key: str) -> Optional[int]:
+        """Size in bytes, or None when the blob does not exist"""
+
+    @abstractmethod
+    def iter_range(self, key: str, start: int, end: int) -> AsyncIterator[bytes]:
+        """Yield bytes ``start``..``end`` (inclusive) of the blob"""
+
+    @abstractmethod
+    def stored_before(self, cutoff: datetime) -> AsyncIterator[str]:
+        """Yield the keys of blobs last stored before ``cutoff`` (UTC)"""
+
+    async def get(self, key: str) -> Optional[bytes]:
+        size = await self.size(key)
+        if size is None:
+            return None
+        return b"".join([chunk async for chunk in self.iter_range(key, 0, size - 1)]) if size else b""
+
+    @abstractmethod
+    async def delete(self, key: str, cutoff: Optional[datetime] = None):
+        """Delete the blob; with ``cutoff``, only if it was not stored again since"""
+
+
+class GridFSBlobStore(BlobStore):
+    def __init__(self, db, bucket_name: str = "blobs"):
+        self.db = db
+        self.bucket_name = bucket_name
+        self.bucket = AsyncIOMotorGridFSBucket(db, bucket_name=bucket_name)
+
+    async def _file(self, key: str) -> Optional[dict]:
+        return await self.db[f"{self.bucket_name}.files"].find_one({"filename": key}, {"length": 1})
+
+    async def put(self, data: bytes) -> str:
+        key = blob_key(data)
+        result = await self.db[f"{self.bucket_name}.files"].update_one(
+            {"filename": key}, {"$set": {"uploadDate": datetime.utcnow()}}
+        )
+        if not result.matched_count:
+            await self.bucket.upload_from_stream(key, data)
+        return key
+
+    async def size(self, key: str) -> Optional[int]:
+        doc = await self._file(key)
+        return doc["length"] if doc else None
+
+    async def iter_range(self, key: str, start: int, end: int) -> AsyncIterator[bytes]:
+        grid_out = await self.bucket.open_download_stream_by_name(key)
+        grid_out.seek(start)
+        remaining = end - start + 1
+        while remaining > 0:
+            chunk = await grid_out.read(min(CHUNK_SIZE, remaining))
+            if not chunk:
+                break
+            remaining -= len(chunk)
+            yield chunk
+
+    async def stored_before(self, cutoff: datetime) -> AsyncIterator[str]:
+        async for doc in self.db[f"{self.bucket_name}.files"].find({"uploadDate": {"$lt": cutoff}}, {"filename": 1}):
+            yield doc["filename"]
+
+    async def delete(self, key: str, cutoff: Optional[datetime] = None):
+        query = {"filename": key}
+        if cutoff is not None:
+            query["uploadDate"] = {"$lt": cutoff}
+        async for doc in self.db[f"{self.bucket_name}.files"].find(query, {"_id": 1}):
+            await self.bucket.delete(doc["_id"])
+
+
+class FileSystemBlobStore(BlobStore):
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def _path(self, key: str) -> Path:
+        if not re.fullmatch(r"[0-9a-f]{64}", key):
+            raise HTTPException(status_code=404, detail="Blob not found")
+        return self.root / key[:2] / key[2:4] / key
+
+    def _write(self, path: Path, data: bytes):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+    def _read(self, path: Path, start: int, length: int) -> bytes:
+        with open(path, "rb") as f:
+            f.seek(start)
+            return f.read(length)
+
+    async def put(self, data: bytes) -> str:
+        key = blob_key(data)
+        path = self._path(key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            await asyncio.to_thread(self._write, path, data)
+        return key
+
+    async def size(self, key: str) -> Optional[int]:
+        try:
+            return self._path(key).stat().st_size
+        except FileNotFoundError:
+            return None
+
+    async def iter_range(self, key: str, start: int, end: int) -> AsyncIterator[bytes]:
+        path = self._path(key)
+        position = start
+        while position <= end:
+            chunk = await asyncio.to_thread(self._read, path, position, min(CHUNK_SIZE, end - position + 1))
+            if not chunk:
+                break
+            position += len(chunk)
+            yield chunk
+
+    def _stored_before(self, cutoff: float) -> list:
+        if not self.root.exists():
+            return []
+        return [
+            path.name for path in self.root.glob("??/??/*")
+            if re.fullmatch(r"[0-9a-f]{64}", path.name) and path.stat().st_mtime < cutoff
+        ]
+
+    async def stored_before(self, cutoff: datetime) -> AsyncIterator[str]:
+        for key in await asyncio.to_thread(self._stored_before, cutoff.replace(tzinfo=timezone.utc).timestamp()):
+            yield key
+
+    async def delete(self, key: str, cutoff: Optional[datetime] = None):
+        path = self._path(key)
+        try:
+            if cutoff is None or path.stat().st_mtime < cutoff.replace(tzinfo=timezone.utc).timestamp():
+                path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+def create_blob_store(db) -> BlobStore:
+    if BLOB_STORE_BACKEND == "filesystem":
+        return FileSystemBlobStore(BLOB_STORE_PATH)
+    return GridFSBlobStore(db)
+
+
+def _parse_range(range_header: str, size: int) -> Optional[Tuple[int, int]]:
+    """Parse a single ``bytes=`` range; None means the range is unsatisfiable"""
+    match = re.fullmatch(r"bytes=(\d*)-(\d*)", range_header.strip())
+    if not match or match.groups() == ("", ""):
+        return None
+    first, last = match.groups()
+    if first == "":
+        length = int(last)
+        if length == 0:
+            return None
+        return max(0, size - length), size - 1
+    start = int(first)
+    end = min(int(last), size - 1) if last else size - 1
+    if start > end or start >= size:
+        return None
+    return start, end
+
+
+def etag_matches(request: Request, etag: str) -> bool:
+    """Whether the request's If-None-Match covers ``etag``"""
+    if_none_match = request.headers.get("if-none-match")
+    return bool(if_none_match) and (
+        if_none_match.strip() == "*" or etag in [t.strip() for t in if_none_match.split(",")]
+    )
+
+
+async def stream_blob(
+    request: Request,
+    store: BlobStore,
+    key: str,
+    content_type: str,
+    filename: Optional[str] = None,
+    cache_control: str = "private, max-age=31536000, immutable",
+) -> Response:
+    """Serve a blob with a strong ETag (its content hash) and single-range support"""
+    size = await store.size(key)
+    if size is None:
+        raise HTTPException(status_code=404, detail="File not found")
+
+    headers = {
+        "ETag": f'"{key}"',
+        "Accept-Ranges": "bytes",
+        "Cache-Control": cache_control,
+    }
+    if filename:
+        headers["Content-Disposition"] = f'attachment; filename="{filename}"'
+
+    if etag_matches(request, headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    range_header = request.headers.get("range")
+    if_range = request.headers.get("if-range")
+    if range_header and size and (not if_range or if_range.strip() == headers["ETag"]):
+        byte_range = _parse_range(range_header, size)
+        if byte_range is None:
+            return Response(
+                status_code=status.HTTP_416_REQUESTED_RANGE_NOT_SATISFIABLE,
+                headers={**headers, "Content-Range": f"bytes */{size}"},
+            )
+        start, end = byte_range
+        headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+        headers["Content-Length"] = str(end - start + 1)
+        return StreamingResponse(
+            store.iter_range(key, start, end),
+            status_code=status.HTTP_206_PARTIAL_CONTENT,
+            media_type=content_type,
+            headers=headers,
+        )
+
+    headers["Content-Length"] = str(size)
+    body = store.iter_range(key, 0, size - 1) if size else iter([b""])
+    return StreamingResponse(body, media_type=content_type, headers=headers)
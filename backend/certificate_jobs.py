@@ -0,0 +1,211 @@
+from datetime import datetime, timedelta
+from typing import Dict, Optional
+import asyncio
+import base64
+import logging
+import os
+import uuid
+
+from fastapi import HTTPException
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from etags import resource_versions
+from models import CertificateJobStatus
+from utils import generate_certificate_pdf_async
+
+logger = logging.getLogger(__name__)
+
+CERTIFICATE_JOB_BATCH_SIZE = int(os.environ.get("CERTIFICATE_JOB_BATCH_SIZE", "50"))
+CERTIFICATE_JOB_LEASE_SECONDS = float(os.environ.get("CERTIFICATE_JOB_LEASE_SECONDS", "60"))
+
+ACTIVE_STATUSES = [CertificateJobStatus.QUEUED.value, CertificateJobStatus.RUNNING.value]
+
+# Jobs driven by this worker, kept referenced so the tasks are not collected
+_running: Dict[str, asyncio.Task] = {}
+
+
+def pending_attendees_query(job: dict) -> dict:
+    """Attendees of the job's event still waiting for a certificate.
+
+    The queue is the registrations collection itself, so a job resumed after a
+    restart simply continues with whatever has not been issued yet.
+    """
+    return {
+        "event_id": job["event_id"],
+        "attendance_marked": True,
+        "certificate_issued": {"$ne": True},
+        "id": {"$nin": [failure["registration_id"] for failure in job.get("failures", [])]},
+    }
+
+
+async def create_certificate_job(db, blob_store, event: dict) -> dict:
+    """Start a job for ``event``, or return the one already in progress.
+
+    ``active`` is set until the job completes; a unique partial index on
+    (event_id where active) keeps concurrent requests from starting two.
+    """
+    existing = await db.certificate_jobs.find_one({"event_id": event["id"], "status": {"$in": ACTIVE_STATUSES}})
+    if existing:
+        start_certificate_job(db, blob_store, existing["id"])
+        return existing
+
+    now = datetime.utcnow()
+    job = {
+        "id": str(uuid.uuid4()),
+        "event_id": event["id"],
+        "event_title": event["title"],
+        "organizer_id": event["organizer_id"],
+        "status": CertificateJobStatus.QUEUED.value,
+        "active": True,
+        "issued": 0,
+        "failed": 0,
+        "failures": [],
+        "created_at": now,
+        "updated_at": now,
+        "completed_at": None,
+        "lease_until": now,
+    }
+    job["total"] = await db.registrations.count_documents(pending_attendees_query(job))
+    try:
+        await db.certificate_jobs.insert_one(job)
+    except DuplicateKeyError:
+        # A concurrent request started the event's job first
+        existing = await db.certificate_jobs.find_one({"event_id": event["id"], "active": True})
+        if not existing:
+            raise
+        start_certificate_job(db, blob_store, existing["id"])
+        return existing
+    start_certificate_job(db, blob_store, job["id"])
+    return job
+
+
+def start_certificate_job(db, blob_store, job_id: str):
+    task = _running.get(job_id)
+    if task is None or task.done():
+        _running[job_id] = asyncio.create_task(run_certificate_job(db, blob_store, job_id))
+
+
+async def _claim(db, job_id: str) -> Optional[dict]:
+    """Take the job's lease; only one worker processes a job at a time"""
+    now = datetime.utcnow()
+    return await db.certificate_jobs.find_one_and_update(
+        {"id": job_id, "status": {"$in": ACTIVE_STATUSES}, "lease_until": {"$lte": now}},
+        {"$set": {
+            "status": CertificateJobStatus.RUNNING.value,
+            "lease_until": now + timedelta(seconds=CERTIFICATE_JOB_LEASE_SECONDS),
+            "updated_at": now,
+        }},
+        return_document=ReturnDocument.AFTER,
+    )
+
+
+async def _render(student_name: str, event_title: str, event_date: str) -> bytes:
+    return base64.b64decode(await generate_certificate_pdf_async(student_name, event_title, event_date))
+
+
+async def run_certificate_job(db, blob_store, job_id: str):
+    """Issue certificates batch by batch until no attendee is left"""
+    try:
+        job = await _claim(db, job_id)
+        if not job:
+            return
+        event = await db.events.find_one({"id": job["event_id"]}, {"date": 1})
+        event_date = event["date"].strftime("%B %d, %Y") if event else ""
+        logger.info(f"Certificate job {job_id} running for event {job['event_id']}")
+
+        while True:
+            batch = await db.registrations.find(
+                pending_attendees_query(job),
+                {"_id": 0, "id": 1, "student_id": 1, "student_name": 1, "event_title": 1},
+            ).limit(CERTIFICATE_JOB_BATCH_SIZE).to_list(CERTIFICATE_JOB_BATCH_SIZE)
+            if not batch:
+                break
+
+            pdfs = await asyncio.gather(
+                *(_render(reg["student_name"], reg["event_title"], event_date) for reg in batch),
+                return_exceptions=True,
+            )
+            issued_date = datetime.utcnow()
+            cert_ops, reg_ops, scopes, failures, shed = [], [], [], [], 0
+            for reg, pdf in zip(batch, pdfs):
+                if isinstance(pdf, HTTPException) and pdf.status_code == 503:
+                    # Executor saturated by interactive traffic; retried in the next batch
+                    shed += 1
+                    continue
+                if isinstance(pdf, Exception):
+                    failures.append({"registration_id": reg["id"], "student_name": reg["student_name"], "error": str(pdf) or type(pdf).__name__})
+                    continue
+                cert_ops.append(UpdateOne(
+                    {"registration_id": reg["id"]},
+                    {"$setOnInsert": {
+                        "id": str(uuid.uuid4()),
+                        "registration_id": reg["id"],
+                        "student_id": reg["student_id"],
+                        "student_name": reg["student_name"],
+                        "event_id": job["event_id"],
+                        "event_title": reg["event_title"],
+                        "issued_date": issued_date,
+                        "certificate_key": await blob_store.put(pdf),
+                    }},
+                    upsert=True,
+                ))
+                reg_ops.append(UpdateOne({"id": reg["id"]}, {"$set": {"certificate_issued": True}}))
+                scopes += [f"registrations:{reg['student_id']}", f"certificates:{reg['student_id']}"]
+
+            if cert_ops:
+                await db.certificates.bulk_write(cert_ops, ordered=False)
+                await db.registrations.bulk_write(reg_ops, ordered=False)
+                await resource_versions.bump(db, *scopes)
+            # Record progress and renew the lease
+            job = await db.certificate_jobs.find_one_and_update(
+                {"id": job_id},
+                {
+                    "$inc": {"issued": len(cert_ops), "failed": len(failures)},
+                    "$push": {"failures": {"$each": failures}},
+                    "$set": {
+                        "lease_until": datetime.utcnow() + timedelta(seconds=CERTIFICATE_JOB_LEASE_SECONDS),
+                        "updated_at": datetime.utcnow(),
+                    },
+                },
+                return_document=ReturnDocument.AFTER,
+            )
+            if shed:
+                await asyncio.sleep(1)
+
+        now = datetime.utcnow()
+        await db.certificate_jobs.update_one(
+            {"id": job_id},
+            {
+                "$set": {"status": CertificateJobStatus.COMPLETED.value, "completed_at": now, "updated_at": now, "lease_until": now},
+                "$unset": {"active": ""},
+            },
+        )
+        logger.info(f"Certificate job {job_id} completed: {job['issued']} issued, {job['failed']} failed")
+    except Exception as e:
+        # The lease runs out and the job is picked up again by resume_certificate_jobs
+        logger.error(f"Certificate job {job_id} interrupted: {str(e)}")
+    finally:
+        _running.pop(job_id, None)
+
+
+async def resume_certificate_jobs(db, blob_store) -> int:
+    """Restart active jobs whose worker went away (lease expired)"""
+    resumed = 0
+    async for job in db.certificate_jobs.find(
+        {"status": {"$in": ACTIVE_STATUSES}, "lease_until": {"$lte": datetime.utcnow()}}, {"id": 1}
+    ):
+        start_certificate_job(db, blob_store, job["id"])
+        resumed += 1
+    return resumed
+
+
+async def resume_certificate_jobs_forever(db, blob_store, interval: float = CERTIFICATE_JOB_LEASE_SECONDS):
+    while True:
+        try:
+            resumed = await resume_certificate_jobs(db, blob_store)
+            if resumed:
+                logger.info(f"Resumed {resumed} certificate jobs")
+        except Exception as e:
+            logger.error(f"Failed to resume certificate jobs: {str(e)}")
+        await asyncio.sleep(interval)
@@ -0,0 +1,347 @@
+from datetime import datetime, timedelta, timezone
+from typing import AsyncIterator, Dict, NamedTuple, Optional, Tuple
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+import zlib
+
+from pymongo import UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from cache import LRUCache
+from etags import resource_versions
+from metrics import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+CHECKIN_ROSTER_EVENTS = int(os.environ.get("CHECKIN_ROSTER_EVENTS", "64"))
+# Rosters are reloaded after this long to pick up scans made on other workers
+CHECKIN_ROSTER_TTL = float(os.environ.get("CHECKIN_ROSTER_TTL", "300"))
+CHECKIN_FLUSH_SECONDS = float(os.environ.get("CHECKIN_FLUSH_SECONDS", "1"))
+CHECKIN_FLUSH_BATCH_SIZE = int(os.environ.get("CHECKIN_FLUSH_BATCH_SIZE", "1000"))
+# Outbox entries older than this are taken over by any worker (their own may have died)
+CHECKIN_OUTBOX_REPLAY_SECONDS = float(os.environ.get("CHECKIN_OUTBOX_REPLAY_SECONDS", "60"))
+
+# Delta queries reach this far behind the requested version, covering clock
+# skew between workers and writes that landed late; replays are idempotent
+ROSTER_DELTA_OVERLAP_SECONDS = float(os.environ.get("ROSTER_DELTA_OVERLAP_SECONDS", "5"))
+# Matches the TTL index on registration_tombstones (database/create_indexes.py)
+ROSTER_TOMBSTONE_DAYS = 30
+
+ROSTER_PROJECTION = {"_id": 0, "id": 1, "qr_code_data": 1, "student_id": 1, "student_name": 1, "attendance_marked": 1}
+EXPORT_PROJECTION = {**ROSTER_PROJECTION, "attendance_time": 1}
+
+
+class RosterEntry:
+    __slots__ = ("registration_id", "qr_code_data", "student_id", "student_name", "attended")
+
+    def __init__(self, registration: dict):
+        self.registration_id = registration["id"]
+        self.qr_code_data = registration["qr_code_data"]
+        self.student_id = registration.get("student_id")
+        self.student_name = registration["student_name"]
+        self.attended = bool(registration.get("attendance_marked"))
+
+
+class PendingWrite(NamedTuple):
+    event_id: str
+    attendance_time: datetime
+    queued: float  # time.monotonic() when accepted
+    scopes: Tuple[str, ...]  # ETag version scopes to bump once written
+
+
+class Roster:
+    """One event's registrations, looked up by id or QR payload"""
+
+    def __init__(self, event_id: str, event_date: Optional[datetime] = None):
+        self.event_id = event_id
+        self.event_date = event_date  # ticket expiry follows it
+        self.by_id: Dict[str, RosterEntry] = {}
+        self.by_qr: Dict[str, RosterEntry] = {}
+
+    def add(self, registration: dict) -> RosterEntry:
+        entry = RosterEntry(registration)
+        self.by_id[entry.registration_id] = entry
+        self.by_qr[entry.qr_code_data] = entry
+        return entry
+
+    def remove(self, registration_id: str):
+        entry = self.by_id.pop(registration_id, None)
+        if entry is not None:
+            self.by_qr.pop(entry.qr_code_data, None)
+
+    def __len__(self) -> int:
+        return len(self.by_id)
+
+
+class CheckInRosters:
+    """In-memory check-in rosters with write-behind attendance updates.
+
+    A scan is answered from the event's roster and its attendance write is
+    recorded in the ``checkin_outbox`` collection (keyed by registration, so
+    a code scanned on two workers is accepted once) before it is
+    acknowledged. A background task applies queued writes with one
+    ``bulk_write`` of conditional updates and then deletes their outbox
+    entries; entries left behind by a worker that died are replayed by the
+    others, so every acknowledged scan is written at least once.
+    Each worker holds its own rosters, so a registration cancelled on
+    another worker is only seen after the roster reloads; the conditional
+    write keeps such scans from being recorded, and they are counted as
+    ``unmatched``.
+    """
+
+    def __init__(self, max_events: int = CHECKIN_ROSTER_EVENTS, ttl: float = CHECKIN_ROSTER_TTL):
+        self._rosters = LRUCache(maxsize=max_events, ttl=ttl)
+        self._loading: Dict[str, asyncio.Task] = {}
+        self._pending: Dict[str, PendingWrite] = {}
+        self._wakeup = asyncio.Event()
+        self.flushed = 0
+        self.replayed = 0
+        self.unmatched = 0
+        self.flush_failures = 0
+        self.last_flush_lag: Optional[float] = None
+        self.flush_latency = LatencyHistogram()
+
+    async def _load(self, db, event_id: str) -> Roster:
+        event = await db.events.find_one({"id": event_id}, {"_id": 0, "date": 1})
+        roster = Roster(event_id, (event or {}).get("date"))
+        async for registration in db.registrations.find({"event_id": event_id}, ROSTER_PROJECTION):
+            roster.add(registration)
+        # Scans accepted (here or on other workers) but not flushed yet
+        queued = {doc["_id"] async for doc in db.checkin_outbox.find({"event_id": event_id}, {"_id": 1})}
+        queued.update(registration_id for registration_id, pending in self._pending.items() if pending.event_id == event_id)
+        for registration_id in queued:
+            entry = roster.by_id.get(registration_id)
+            if entry is not None:
+                entry.attended = True
+        self._rosters.set(event_id, roster)
+        logger.info(f"Check-in roster loaded for event {event_id} with {len(roster)} registrations")
+        return roster
+
+    async def get(self, db, event_id: str) -> Roster:
+        """The event's roster, loaded once even under concurrent first scans"""
+        roster = self._rosters.get(event_id)
+        if roster is not None:
+            return roster
+        task = self._loading.get(event_id)
+        if task is None:
+            task = asyncio.create_task(self._load(db, event_id))
+            self._loading[event_id] = task
+            task.add_done_callback(lambda _: self._loading.pop(event_id, None))
+        return await asyncio.shield(task)
+
+    def find_qr(self, qr_code_data: str) -> Optional[Tuple[Roster, RosterEntry]]:
+        """Search loaded rosters for a payload that does not name its event"""
+        for roster in self._rosters.values():
+            entry = roster.by_qr.get(qr_code_data)
+            if entry is not None:
+                return roster, entry
+        return None
+
+    async def lookup(self, db, roster: Roster, registration_id: Optional[str] = None, qr_code_data: Optional[str] = None) -> Optional[RosterEntry]:
+        """Find a registration, falling back to the database for ones made after the load"""
+        entry = roster.by_id.get(registration_id) if registration_id else roster.by_qr.get(qr_code_data)
+        if entry is not None:
+            return entry
+        query = {"id": registration_id} if registration_id else {"qr_code_data": qr_code_data}
+        registration = await db.registrations.find_one({**query, "event_id": roster.event_id}, ROSTER_PROJECTION)
+        if not registration:
+            return None
+        entry = roster.add(registration)
+        if entry.registration_id in self._pending:
+            entry.attended = True
+        return entry
+
+    async def mark(self, db, event_id: str, entry: RosterEntry, attendance_time: datetime, scopes: Tuple[str, ...] = ()) -> bool:
+        """Persist the scan to the outbox and queue its write; False if it was already accepted"""
+        scopes = (f"registrations:{entry.student_id}", *scopes)
+        try:
+            await db.checkin_outbox.insert_one({
+                "_id": entry.registration_id,
+                "event_id": event_id,
+                "attendance_time": attendance_time,
+                "scopes": list(scopes),
+                "queued_at": datetime.utcnow(),
+            })
+        except DuplicateKeyError:
+            entry.attended = True
+            return False
+        entry.attended = True
+        self._pending.setdefault(entry.registration_id, PendingWrite(event_id, attendance_time, time.monotonic(), scopes))
+        if len(self._pending) >= CHECKIN_FLUSH_BATCH_SIZE:
+            self._wakeup.set()
+        return True
+
+    def pending_count(self, event_id: str) -> int:
+        return sum(1 for pending in self._pending.values() if pending.event_id == event_id)
+
+    def marked_elsewhere(self, event_id: str, registration_id: str):
+        """Keep a loaded roster in step with attendance written directly"""
+        roster = self._rosters.get(event_id)
+        entry = roster.by_id.get(registration_id) if roster is not None else None
+        if entry is not None:
+            entry.attended = True
+
+    def is_attended(self, event_id: str, registration_id: str) -> bool:
+        if registration_id in self._pending:
+            return True
+        roster = self._rosters.get(event_id)
+        entry = roster.by_id.get(registration_id) if roster is not None else None
+        return entry is not None and entry.attended
+
+    def remove(self, event_id: str, registration_id: str):
+        roster = self._rosters.get(event_id)
+        if roster is not None:
+            roster.remove(registration_id)
+
+    def invalidate(self, event_id: str):
+        self._rosters.pop(event_id)
+
+    async def flush(self, db) -> int:
+        """Write queued attendance; failed batches stay queued for the next flush"""
+        if not self._pending:
+            return 0
+        batch = list(self._pending.items())[:CHECKIN_FLUSH_BATCH_SIZE]
+        started = time.monotonic()
+        try:
+            result = await db.registrations.bulk_write([
+                UpdateOne(
+                    {"id": registration_id, "attendance_marked": False},
+                    {"$set": {"attendance_marked": True, "attendance_time": pending.attendance_time, "roster_updated_at": datetime.utcnow()}},
+                )
+                for registration_id, pending in batch
+            ], ordered=False)
+        except Exception:
+            self.flush_failures += 1
+            raise
+        finished = time.monotonic()
+        self.flush_latency.observe(finished - started)
+        self.last_flush_lag = finished - min(pending.queued for _, pending in batch)
+        await db.checkin_outbox.delete_many({"_id": {"$in": [registration_id for registration_id, _ in batch]}})
+        for registration_id, _ in batch:
+            self._pending.pop(registration_id, None)
+        if result.matched_count < len(batch):
+            await self._unmatched(db, batch, len(batch) - result.matched_count)
+        await resource_versions.bump(db, *(scope for _, pending in batch for scope in pending.scopes))
+        self.flushed += len(batch)
+        return len(batch)
+
+    async def _unmatched(self, db, batch: list, count: int):
+        """Account for queued scans whose registration was marked or cancelled elsewhere"""
+        self.unmatched += count
+        ids = [registration_id for registration_id, _ in batch]
+        cancelled = set(ids) - set(await db.registrations.distinct("id", {"id": {"$in": ids}}))
+        for registration_id, pending in batch:
+            if registration_id in cancelled:
+                self.remove(pending.event_id, registration_id)
+        logger.warning(
+            f"{count} attendance writes matched no unmarked registration; cancelled meanwhile: {sorted(cancelled)}"
+        )
+
+    async def replay(self, db, older_than: float = CHECKIN_OUTBOX_REPLAY_SECONDS) -> int:
+        """Queue outbox entries that no worker flushed in time, e.g. because it died"""
+        cutoff = datetime.utcnow() - timedelta(seconds=older_than)
+        replayed = 0
+        async for doc in db.checkin_outbox.find({"queued_at": {"$lte": cutoff}}):
+            if doc["_id"] not in self._pending:
+                self._pending[doc["_id"]] = PendingWrite(
+                    doc["event_id"], doc["attendance_time"], time.monotonic(), tuple(doc.get("scopes", ()))
+                )
+                replayed += 1
+        if replayed:
+            self.replayed += replayed
+            logger.warning(f"Replaying {replayed} attendance writes left in the check-in outbox")
+        return replayed
+
+    async def flush_forever(self, db, interval: float = CHECKIN_FLUSH_SECONDS):
+        last_replay = None
+        while True:
+            if last_replay is None or time.monotonic() - last_replay >= CHECKIN_OUTBOX_REPLAY_SECONDS:
+                try:
+                    await self.replay(db)
+                    last_replay = time.monotonic()
+                except Exception as e:
+                    logger.error(f"Failed to replay the check-in outbox: {str(e)}")
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            try:
+                while await self.flush(db) >= CHECKIN_FLUSH_BATCH_SIZE:
+                    pass
+            except Exception as e:
+                logger.error(f"Failed to flush {len(self._pending)} attendance writes: {str(e)}")
+
+    async def drain(self, db):
+        """Flush everything still queued, e.g. on shutdown"""
+        while self._pending:
+            await self.flush(db)
+
+    def stats(self) -> dict:
+        oldest = min((pending.queued for pending in self._pending.values()), default=None)
+        return {
+            **self._rosters.stats(),
+            "registrations": sum(len(roster) for roster in self._rosters.values()),
+            "pending_writes": len(self._pending),
+            "write_lag_seconds": round(time.monotonic() - oldest, 3) if oldest is not None else 0.0,
+            "last_flush_lag_seconds": round(self.last_flush_lag, 3) if self.last_flush_lag is not None else None,
+            "flushed": self.flushed,
+            "replayed": self.replayed,
+            "unmatched": self.unmatched,
+            "flush_failures": self.flush_failures,
+            "flush_latency": self.flush_latency.snapshot(),
+        }
+
+
+checkin_rosters = CheckInRosters()
+
+
+def qr_hash(qr_code_data: str) -> str:
+    """What offline scanners store instead of the payload itself"""
+    return hashlib.sha256(qr_code_data.encode()).hexdigest()[:32]
+
+
+def roster_version(when: datetime) -> int:
+    return int(when.replace(tzinfo=timezone.utc).timestamp() * 1000)
+
+
+def version_time(version: int) -> datetime:
+    return datetime.fromtimestamp(version / 1000, tz=timezone.utc).replace(tzinfo=None)
+
+
+async def roster_records(db, event_id: str, version: int, since: Optional[int] = None) -> AsyncIterator[dict]:
+    """A header line, then one record per registration (changed since ``since``) and removals"""
+    yield {"type": "roster", "event_id": event_id, "version": version, "since": since}
+    query = {"event_id": event_id}
+    if since is not None:
+        cutoff = version_time(since) - timedelta(seconds=ROSTER_DELTA_OVERLAP_SECONDS)
+        query["roster_updated_at"] = {"$gt": cutoff}
+    async for registration in db.registrations.find(query, EXPORT_PROJECTION).batch_size(1000):
+        attended = registration.get("attendance_marked") or checkin_rosters.is_attended(event_id, registration["id"])
+        yield {
+            "type": "registration",
+            "id": registration["id"],
+            "qr_hash": qr_hash(registration["qr_code_data"]),
+            "student_name": registration["student_name"],
+            "attended": bool(attended),
+            "attendance_time": registration["attendance_time"].isoformat() if registration.get("attendance_time") else None,
+        }
+    if since is not None:
+        async for tombstone in db.registration_tombstones.find(
+            {"event_id": event_id, "deleted_at": {"$gt": cutoff}}, {"_id": 0, "registration_id": 1}
+        ):
+            yield {"type": "removed", "id": tombstone["registration_id"]}
+
+
+async def gzip_ndjson(records: AsyncIterator[dict]) -> AsyncIterator[bytes]:
+    """Compress records as they are produced; nothing is materialized"""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    async for record in records:
+        chunk = compressor.compress(json.dumps(record, separators=(",", ":")).encode() + b"\n")
+        if chunk:
+            yield chunk
+    yield compressor.flush()
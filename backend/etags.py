@@ -0,0 +1,153 @@
+from typing import Callable, Dict, List, Optional, Tuple
+import hashlib
+import logging
+import os
+import re
+import time
+import uuid
+
+from fastapi import HTTPException
+from pymongo import UpdateOne
+from starlette.datastructures import Headers
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from auth import decode_token
+
+logger = logging.getLogger(__name__)
+
+# Responses that depend on the clock (e.g. "upcoming" counts) get a new ETag this often
+ETAG_TIME_BUCKET_SECONDS = int(os.environ.get("ETAG_TIME_BUCKET_SECONDS", "60"))
+
+# Stands in for scopes never written since the versions collection was created;
+# differs per process, so such responses are at worst re-sent, never stale
+_BOOT_VERSION = uuid.uuid4().hex[:12]
+
+
+class ResourceVersions:
+    """Version tokens per scope ("event:<id>", "organizer:<id>", "registrations:<student>", ...).
+
+    Write paths bump the scopes they touch after writing; conditional GETs
+    read the tokens of the scopes a response depends on, one query for all.
+    """
+
+    def __init__(self):
+        self.checked = 0
+        self.not_modified = 0
+
+    async def bump(self, db, *scopes: str):
+        scopes = [scope for scope in dict.fromkeys(scopes) if scope]
+        if not scopes:
+            return
+        try:
+            await db.resource_versions.bulk_write(
+                [UpdateOne({"_id": scope}, {"$set": {"v": uuid.uuid4().hex[:12]}}, upsert=True) for scope in scopes],
+                ordered=False,
+            )
+        except Exception as e:
+            # The next write to the same scope fixes it; meanwhile clients may see a stale 304
+            logger.error(f"Failed to bump versions {scopes}: {str(e)}")
+
+    async def current(self, db, scopes: List[str]) -> Dict[str, str]:
+        versions = {doc["_id"]: doc["v"] async for doc in db.resource_versions.find({"_id": {"$in": scopes}})}
+        return {scope: versions.get(scope, _BOOT_VERSION) for scope in scopes}
+
+    def stats(self) -> dict:
+        return {"checked": self.checked, "not_modified": self.not_modified}
+
+
+resource_versions = ResourceVersions()
+
+
+# (path pattern, scopes for (match, user id), depends on the clock)
+ScopeRule = Tuple["re.Pattern[str]", Callable[[re.Match, str], List[str]], bool]
+
+# GET /api/events is left out: its pages come from the per-worker response
+# cache, so it is tagged with a hash of the cached body instead (body_etag)
+CONDITIONAL_ROUTES: List[ScopeRule] = [
+    (re.compile(r"/api/events/([^/]+)"), lambda m, user: [f"event:{m.group(1)}"], False),
+    (re.compile(r"/api/registrations/my-registrations"), lambda m, user: [f"registrations:{user}"], False),
+    (re.compile(r"/api/certificates/my-certificates"), lambda m, user: [f"certificates:{user}"], False),
+    (re.compile(r"/api/dashboard/student"), lambda m, user: [f"registrations:{user}"], True),
+    (re.compile(r"/api/dashboard/organizer"), lambda m, user: [f"organizer:{user}"], True),
+]
+
+
+def body_etag(*parts: bytes) -> str:
+    """Weak ETag for a rendered response, for routes whose body may lag the versions"""
+    return f'W/"{hashlib.sha256(b"|".join(parts)).hexdigest()[:24]}"'
+
+
+def _match(path: str) -> Optional[Tuple[re.Match, ScopeRule]]:
+    for rule in CONDITIONAL_ROUTES:
+        match = rule[0].fullmatch(path)
+        if match:
+            return match, rule
+    return None
+
+
+def _bearer_subject(headers: Headers) -> Optional[str]:
+    scheme, _, token = headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        return decode_token(token).get("sub")
+    except HTTPException:
+        return None
+
+
+class ConditionalGetMiddleware:
+    """ETag / If-None-Match for the read endpoints in ``CONDITIONAL_ROUTES``.
+
+    The ETag is derived from the version tokens of the scopes a response
+    depends on, the caller and the query string, so a matching request is
+    answered 304 before the route handler (and its queries) runs. Requests
+    without a valid token fall through to the handler, which rejects them.
+    """
+
+    def __init__(self, app: ASGIApp, get_db: Callable[[], object]):
+        self.app = app
+        self.get_db = get_db
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] != "GET":
+            return await self.app(scope, receive, send)
+        found = _match(scope["path"])
+        if found is None:
+            return await self.app(scope, receive, send)
+        headers = Headers(scope=scope)
+        user_id = _bearer_subject(headers)
+        if user_id is None:
+            return await self.app(scope, receive, send)
+
+        match, (_, scopes_for, clock) = found
+        scopes = scopes_for(match, user_id)
+        try:
+            versions = await resource_versions.current(self.get_db(), scopes)
+        except Exception as e:
+            logger.error(f"Failed to read versions {scopes}: {str(e)}")
+            return await self.app(scope, receive, send)
+        parts = [scope["path"], scope.get("query_string", b"").decode(), user_id]
+        parts += [f"{name}={versions[name]}" for name in scopes]
+        if clock:
+            parts.append(str(int(time.time()) // ETAG_TIME_BUCKET_SECONDS))
+        etag = f'W/"{hashlib.sha256("|".join(parts).encode()).hexdigest()[:24]}"'
+        cache_headers = [
+            (b"etag", etag.encode()),
+            (b"cache-control", b"private, no-cache"),
+            (b"vary", b"Authorization"),
+        ]
+
+        resource_versions.checked += 1
+        if_none_match = headers.get("if-none-match")
+        if if_none_match and etag in [tag.strip() for tag in if_none_match.split(",")]:
+            resource_versions.not_modified += 1
+            await send({"type": "http.response.start", "status": 304, "headers": cache_headers})
+            await send({"type": "http.response.body", "body": b""})
+            return
+
+        async def send_with_etag(message: Message):
+            if message["type"] == "http.response.start" and message["status"] == 200:
+                message = {**message, "headers": [*message.get("headers", []), *cache_headers]}
+            await send(message)
+
+        await self.app(scope, receive, send_with_etag)
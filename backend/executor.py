@@ -0,0 +1,198 @@
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from typing import Dict, Optional
+from fastapi import HTTPException, status
+import asyncio
+import logging
+import os
+import time
+
+from metrics import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+CPU_EXECUTOR_KIND = os.environ.get('CPU_EXECUTOR_KIND', 'process')  # "process" or "thread"
+CPU_EXECUTOR_WORKERS = int(os.environ.get('CPU_EXECUTOR_WORKERS', os.cpu_count() or 2))
+CPU_EXECUTOR_MAX_QUEUE = int(os.environ.get('CPU_EXECUTOR_MAX_QUEUE', 64))
+CPU_TASK_TIMEOUT = float(os.environ.get('CPU_TASK_TIMEOUT', 30))
+
+
+def parse_task_settings(value: str) -> Dict[str, float]:
+    """``"certificate_pdf=10,qr_code=2"`` -> ``{"certificate_pdf": 10.0, "qr_code": 2.0}``"""
+    settings = {}
+    for item in filter(None, (part.strip() for part in value.split(","))):
+        name, _, setting = item.partition("=")
+        settings[name.strip()] = float(setting)
+    return settings
+
+
+# Per task type overrides; bulk certificate rendering may use at most half the
+# workers by default so logins (password hashing) are never starved
+CPU_TASK_TIMEOUTS = parse_task_settings(os.environ.get('CPU_TASK_TIMEOUTS', 'certificate_pdf=20,qr_code=5,event_neighbors=600'))
+CPU_TASK_CONCURRENCY = parse_task_settings(
+    os.environ.get('CPU_TASK_CONCURRENCY', f'certificate_pdf={max(1, CPU_EXECUTOR_WORKERS // 2)}')
+)
+
+
+class TaskStats:
+    """Limits and counters for one task type"""
+
+    def __init__(self, timeout: float, max_concurrency: Optional[int]):
+        self.timeout = timeout
+        self.max_concurrency = max_concurrency
+        self.semaphore = asyncio.Semaphore(max_concurrency) if max_concurrency else None
+        self.in_flight = 0
+        self.waiting = 0  # for a concurrency slot, outside the shared backlog
+        self.completed = 0
+        self.failed = 0
+        self.timed_out = 0
+        self.latency = LatencyHistogram()
+
+    def metrics(self) -> dict:
+        return {
+            "timeout": self.timeout,
+            "max_concurrency": self.max_concurrency,
+            "in_flight": self.in_flight,
+            "waiting": self.waiting,
+            "completed": self.completed,
+            "failed": self.failed,
+            "timed_out": self.timed_out,
+            "latency": self.latency.snapshot(),
+        }
+
+
+class CPUExecutor:
+    """Runs CPU-bound functions off the event loop with a bounded backlog.
+
+    Once every worker is busy and ``max_queue`` more tasks are already waiting,
+    new submissions are shed with a 503 instead of piling up behind the pool.
+    Each task type has its own timeout (504 when exceeded), optional
+    concurrency limit and latency histogram; tasks held back by their type's
+    limit wait outside the shared backlog, so they cannot crowd out others.
+    """
+
+    def __init__(
+        self,
+        kind: str = "process",
+        max_workers: int = 2,
+        max_queue: int = 64,
+        timeout: float = CPU_TASK_TIMEOUT,
+        task_timeouts: Optional[Dict[str, float]] = None,
+        task_concurrency: Optional[Dict[str, float]] = None,
+    ):
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self.task_timeouts = task_timeouts or {}
+        self.task_concurrency = task_concurrency or {}
+        self.tasks: Dict[str, TaskStats] = {}
+        self._pool = None
+        self._pending = 0
+        self.completed = 0
+        self.failed = 0
+        self.rejected = 0
+
+    def _get_pool(self):
+        if self._pool is None:
+            if self.kind == "thread":
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="cpu")
+            else:
+                self._pool = ProcessPoolExecutor(max_workers=self.max_workers)
+            logger.info(f"Started {self.kind} CPU executor with {self.max_workers} workers")
+        return self._pool
+
+    @property
+    def queue_depth(self) -> int:
+        return max(0, self._pending - self.max_workers)
+
+    def _task(self, task_type: str) -> TaskStats:
+        stats = self.tasks.get(task_type)
+        if stats is None:
+            concurrency = self.task_concurrency.get(task_type)
+            stats = TaskStats(self.task_timeouts.get(task_type, self.timeout), int(concurrency) if concurrency else None)
+            self.tasks[task_type] = stats
+        return stats
+
+    async def run(self, fn, *args, **kwargs):
+        """Run ``fn(*args, **kwargs)`` in the pool; ``fn`` must be picklable for process pools"""
+        return await self.run_task(getattr(fn, "__name__", "task"), fn, *args, **kwargs)
+
+    async def run_task(self, task_type: str, fn, *args, **kwargs):
+        """Like ``run``, with limits and metrics tracked under ``task_type``.
+
+        Tasks waiting for their type's concurrency slot are not part of the
+        shared backlog yet, and their timeout starts once they get the slot.
+        """
+        stats = self._task(task_type)
+        started = time.perf_counter()
+        if stats.semaphore is not None:
+            stats.waiting += 1
+            try:
+                await stats.semaphore.acquire()
+            finally:
+                stats.waiting -= 1
+
+        if self._pending >= self.max_workers + self.max_queue:
+            if stats.semaphore is not None:
+                stats.semaphore.release()
+            self.rejected += 1
+            logger.warning(f"CPU executor saturated ({self._pending} pending), shedding {task_type}")
+            raise HTTPException(
+                status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+                detail="Server is busy, please retry shortly",
+                headers={"Retry-After": "1"},
+            )
+
+        stats.in_flight += 1
+        self._pending += 1
+        future = asyncio.get_running_loop().run_in_executor(self._get_pool(), partial(fn, *args, **kwargs))
+
+        def release(_):
+            # A timed-out or abandoned task keeps its worker, queue slot and
+            # concurrency slot until it really ends
+            self._pending -= 1
+            stats.in_flight -= 1
+            if stats.semaphore is not None:
+                stats.semaphore.release()
+
+        future.add_done_callback(release)
+        try:
+            result = await asyncio.wait_for(asyncio.shield(future), stats.timeout)
+        except asyncio.TimeoutError:
+            stats.timed_out += 1
+            logger.warning(f"CPU task {task_type} timed out after {stats.timeout}s")
+            raise HTTPException(status_code=status.HTTP_504_GATEWAY_TIMEOUT, detail="Task timed out")
+        except Exception:
+            stats.failed += 1
+            self.failed += 1
+            raise
+        finally:
+            stats.latency.observe(time.perf_counter() - started)
+        stats.completed += 1
+        self.completed += 1
+        return result
+
+    def metrics(self) -> dict:
+        return {
+            "kind": self.kind,
+            "max_workers": self.max_workers,
+            "max_queue": self.max_queue,
+            "in_flight": min(self._pending, self.max_workers),
+            "queue_depth": self.queue_depth,
+            "completed": self.completed,
+            "failed": self.failed,
+            "rejected": self.rejected,
+            "tasks": {task_type: stats.metrics() for task_type, stats in self.tasks.items()},
+        }
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+cpu_executor = CPUExecutor(
+    CPU_EXECUTOR_KIND, CPU_EXECUTOR_WORKERS, CPU_EXECUTOR_MAX_QUEUE,
+    CPU_TASK_TIMEOUT, CPU_TASK_TIMEOUTS, CPU_TASK_CONCURRENCY,
+)
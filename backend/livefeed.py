@@ -0,0 +1,135 @@
+from typing import AsyncIterator, Awaitable, Callable, Dict, Optional, Set
+import asyncio
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+LIVE_FEED_POLL_SECONDS = float(os.environ.get("LIVE_FEED_POLL_SECONDS", "2"))
+LIVE_FEED_HEARTBEAT_SECONDS = float(os.environ.get("LIVE_FEED_HEARTBEAT_SECONDS", "15"))
+LIVE_FEED_QUEUE_SIZE = 16
+
+
+def _deltas(previous: Optional[dict], counts: dict) -> dict:
+    if previous is None:
+        return {}
+    return {
+        key: value - (previous.get(key) or 0)
+        for key, value in counts.items()
+        if isinstance(value, int) and value != previous.get(key)
+    }
+
+
+class _Topic:
+    def __init__(self):
+        self.subscribers: Set[asyncio.Queue] = set()
+        self.snapshot: Optional[dict] = None
+        self.wakeup = asyncio.Event()
+        self.task: Optional[asyncio.Task] = None
+
+
+class LiveFeed:
+    """Per-worker pub/sub of live counters, one producer per watched event.
+
+    While an event has viewers, a single task re-reads its counters every
+    ``poll_interval`` seconds (or right away after ``nudge``, called by local
+    writes) and fans changes out to every viewer. Writes on other workers are
+    picked up by the poll, so N viewers cost one query per interval.
+    """
+
+    def __init__(self, load: Callable[[str], Awaitable[Optional[dict]]], poll_interval: float = LIVE_FEED_POLL_SECONDS):
+        self._load = load
+        self.poll_interval = poll_interval
+        self._topics: Dict[str, _Topic] = {}
+        self.published = 0
+        self.dropped = 0
+
+    def nudge(self, event_id: str):
+        topic = self._topics.get(event_id)
+        if topic is not None:
+            topic.wakeup.set()
+
+    def _publish(self, topic: _Topic, message: dict):
+        self.published += 1
+        for queue in topic.subscribers:
+            if queue.full():
+                # Slow viewer: drop its oldest message, every message carries full counts
+                queue.get_nowait()
+                self.dropped += 1
+            queue.put_nowait(message)
+
+    async def _produce(self, event_id: str, topic: _Topic):
+        while topic.subscribers:
+            topic.wakeup.clear()
+            try:
+                counts = await self._load(event_id)
+            except Exception as e:
+                # Keep what viewers have and retry on the next poll
+                logger.error(f"Failed to read live counters for event {event_id}: {str(e)}")
+            else:
+                if counts is None:
+                    self._publish(topic, {"type": "deleted", "event_id": event_id})
+                    return
+                if counts != topic.snapshot:
+                    previous, topic.snapshot = topic.snapshot, counts
+                    self._publish(topic, {"type": "update", "event_id": event_id, **counts, "deltas": _deltas(previous, counts)})
+            try:
+                await asyncio.wait_for(topic.wakeup.wait(), timeout=self.poll_interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def subscribe(self, event_id: str) -> AsyncIterator[dict]:
+        """Yield the current counters, then every change until the viewer leaves"""
+        topic = self._topics.setdefault(event_id, _Topic())
+        queue: asyncio.Queue = asyncio.Queue(maxsize=LIVE_FEED_QUEUE_SIZE)
+        topic.subscribers.add(queue)
+        if topic.snapshot is not None:
+            queue.put_nowait({"type": "update", "event_id": event_id, **topic.snapshot, "deltas": {}})
+        if topic.task is None or topic.task.done():
+            topic.task = asyncio.create_task(self._produce(event_id, topic))
+        try:
+            while True:
+                message = await queue.get()
+                yield message
+                if message["type"] == "deleted":
+                    return
+        finally:
+            topic.subscribers.discard(queue)
+            if not topic.subscribers:
+                topic.task.cancel()
+                if self._topics.get(event_id) is topic:
+                    del self._topics[event_id]
+
+    def stats(self) -> dict:
+        return {
+            "events": len(self._topics),
+            "viewers": sum(len(topic.subscribers) for topic in self._topics.values()),
+            "published": self.published,
+            "dropped": self.dropped,
+        }
+
+
+async def server_sent_events(messages: AsyncIterator[dict], heartbeat: float = LIVE_FEED_HEARTBEAT_SECONDS) -> AsyncIterator[str]:
+    """Format messages as SSE, with comment lines keeping idle proxies open"""
+    iterator = messages.__aiter__()
+    next_message = asyncio.ensure_future(iterator.__anext__())
+    try:
+        while True:
+            done, _ = await asyncio.wait({next_message}, timeout=heartbeat)
+            if not done:
+                yield ": keepalive\n\n"
+                continue
+            try:
+                message = next_message.result()
+            except StopAsyncIteration:
+                return
+            yield f"event: {message['type']}\ndata: {json.dumps(message, separators=(',', ':'))}\n\n"
+            next_message = asyncio.ensure_future(iterator.__anext__())
+    finally:
+        next_message.cancel()
+        try:
+            await next_message
+        except (asyncio.CancelledError, StopAsyncIteration):
+            pass
+        await iterator.aclose()
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field, EmailStr
-from typing import Optional, List
+from typing import Dict, Optional, List
 from datetime import datetime
 from enum import Enum
 
@@ -50,7 +50,7 @@ class EventBase(BaseModel):
     college: str
     category: Optional[str] = "General"
     max_participants: Optional[int] = None
-    image: Optional[str] = None  # base64 image
+    image: Optional[str] = None  # base64 image on input; stored in the blob store
 
 class EventCreate(EventBase):
     pass
@@ -59,7 +59,33 @@ class Event(EventBase):
     id: str
     organizer_id: str
     organizer_name: str
+    image_key: Optional[str] = None  # blob store key, served by GET /events/{id}/image
     current_registrations: int = 0
+    waitlist_count: int = 0
+    average_rating: float = 0.0
+    total_ratings: int = 0
+    rating_histogram: Dict[str, int] = Field(default_factory=dict)  # star ("1".."5") -> count
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Config:
+        from_attributes = True
+
+class EventSummary(BaseModel):
+    """Event without its inline image, returned by list endpoints"""
+    id: str
+    title: str
+    description: str
+    date: datetime
+    venue: str
+    fee: float
+    college: str
+    category: Optional[str] = "General"
+    max_participants: Optional[int] = None
+    organizer_id: str
+    organizer_name: str
+    image_key: Optional[str] = None
+    current_registrations: int = 0
+    waitlist_count: int = 0
     average_rating: float = 0.0
     total_ratings: int = 0
     created_at: datetime = Field(default_factory=datetime.utcnow)
@@ -69,6 +95,7 @@ class Event(EventBase):
 
 class RegistrationCreate(BaseModel):
     event_id: str
+    join_waitlist: bool = False  # queue for a seat instead of failing when the event is full
 
 class Registration(BaseModel):
     id: str
@@ -86,13 +113,52 @@ class Registration(BaseModel):
     class Config:
         from_attributes = True
 
+class WaitlistEntry(BaseModel):
+    id: str
+    event_id: str
+    event_title: str
+    student_id: str
+    student_name: str
+    position: int  # 1 = next to be promoted
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+
+    class Config:
+        from_attributes = True
+
 class AttendanceMarkRequest(BaseModel):
     qr_code_data: str
 
+class AttendanceScan(BaseModel):
+    qr_code_data: str
+    scanned_at: datetime  # when the scanner read the code, possibly while offline
+
+class AttendanceSyncRequest(BaseModel):
+    scans: List[AttendanceScan] = Field(max_length=5000)
+
+class AttendanceScanStatus(str, Enum):
+    MARKED = "marked"
+    ALREADY_MARKED = "already_marked"
+    DUPLICATE = "duplicate"  # same code earlier in this batch
+    INVALID = "invalid"
+    EXPIRED = "expired"
+    FORBIDDEN = "forbidden"
+
+class AttendanceScanResult(BaseModel):
+    qr_code_data: str
+    status: AttendanceScanStatus
+    student_name: Optional[str] = None
+    attendance_time: Optional[datetime] = None
+
+class AttendanceSyncResult(BaseModel):
+    """One result per submitted scan, in request order"""
+    results: List[AttendanceScanResult]
+    marked: int = 0
+
 class CertificateIssueRequest(BaseModel):
     registration_id: str
 
-class Certificate(BaseModel):
+class CertificateSummary(BaseModel):
+    """Certificate without the PDF, returned by list endpoints"""
     id: str
     registration_id: str
     student_id: str
@@ -100,8 +166,38 @@ class Certificate(BaseModel):
     event_id: str
     event_title: str
     issued_date: datetime = Field(default_factory=datetime.utcnow)
+    certificate_key: Optional[str] = None  # blob store key, served by GET /certificates/{id}/download
+
+    class Config:
+        from_attributes = True
+
+class Certificate(CertificateSummary):
     certificate_data: str  # base64 encoded PDF
 
+class CertificateJobStatus(str, Enum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+
+class CertificateJobFailure(BaseModel):
+    registration_id: str
+    student_name: str
+    error: str
+
+class CertificateJob(BaseModel):
+    """Bulk certificate issuance for every attendee of an event"""
+    id: str
+    event_id: str
+    event_title: str
+    status: CertificateJobStatus = CertificateJobStatus.QUEUED
+    total: int = 0
+    issued: int = 0
+    failed: int = 0
+    failures: List[CertificateJobFailure] = []
+    created_at: datetime = Field(default_factory=datetime.utcnow)
+    updated_at: datetime = Field(default_factory=datetime.utcnow)
+    completed_at: Optional[datetime] = None
+
     class Config:
         from_attributes = True
 
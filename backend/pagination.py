@@ -0,0 +1,54 @@
+from typing import Any, Optional, Tuple
+from bson import json_util
+from fastapi import HTTPException
+import base64
+import binascii
+import json
+
+DEFAULT_PAGE_SIZE = 100
+MAX_PAGE_SIZE = 200
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(sort_value: Any, doc_id: str) -> str:
+    """Encode the (sort value, id) of the last item on a page as an opaque cursor"""
+    raw = json_util.dumps([sort_value, doc_id]).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[Any, str]:
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        sort_value, doc_id = json_util.loads(raw)
+    except (binascii.Error, ValueError, TypeError, json.JSONDecodeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+    return sort_value, doc_id
+
+
+def keyset_query(query: dict, field: str, cursor: Optional[str], direction: int = 1) -> dict:
+    """Restrict ``query`` to documents strictly after ``cursor`` in (field, id) order"""
+    if not cursor:
+        return query
+    sort_value, doc_id = decode_cursor(cursor)
+    op = "$gt" if direction == 1 else "$lt"
+    after = {"$or": [
+        {field: {op: sort_value}},
+        {field: sort_value, "id": {op: doc_id}},
+    ]}
+    return {"$and": [query, after]} if query else after
+
+
+def keyset_sort(field: str, direction: int = 1) -> list:
+    return [(field, direction), ("id", direction)]
+
+
+def next_cursor(docs: list, field: str, limit: int) -> Optional[str]:
+    """Cursor for the page after ``docs``, or None when it was the last page.
+
+    Callers fetch ``limit + 1`` documents; the extra one only signals that
+    more results exist and is trimmed off by the caller.
+    """
+    if len(docs) <= limit:
+        return None
+    last = docs[limit - 1]
+    return encode_cursor(last.get(field), last.get("id"))
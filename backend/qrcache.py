@@ -0,0 +1,77 @@
+from pathlib import Path
+from typing import Optional
+import asyncio
+import hashlib
+import os
+import uuid
+
+from cache import LRUCache
+from utils import QR_IMAGE_FORMATS, generate_qr_image
+from executor import cpu_executor
+
+QR_CACHE_SIZE = int(os.environ.get("QR_CACHE_SIZE", 4096))
+QR_CACHE_PATH = os.environ.get("QR_CACHE_PATH", str(Path(__file__).parent / "qr_cache"))
+# Bump when generate_qr_image output changes, so ETags and disk entries roll over
+QR_RENDER_VERSION = 1
+
+
+def _read(path: Path) -> Optional[bytes]:
+    try:
+        return path.read_bytes()
+    except FileNotFoundError:
+        return None
+
+
+def _write(path: Path, data: bytes):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f".{path.name}.{uuid.uuid4().hex}")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
+class QRCodeCache:
+    """Rendered QR images keyed by the SHA-256 of their payload.
+
+    A bounded in-process LRU sits in front of an on-disk cache; images are
+    only rendered (in the CPU executor) when neither has them. Payloads never
+    change, so the ETag is known without rendering anything.
+    """
+
+    def __init__(self, root: str, maxsize: int):
+        self.root = Path(root) / f"v{QR_RENDER_VERSION}"
+        self._memory = LRUCache(maxsize=maxsize)
+        self.disk_hits = 0
+        self.renders = 0
+
+    @staticmethod
+    def digest(payload: str) -> str:
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def etag(self, payload: str, image_format: str) -> str:
+        return f'"{self.digest(payload)}.{image_format}.v{QR_RENDER_VERSION}"'
+
+    async def get(self, payload: str, image_format: str) -> bytes:
+        if image_format not in QR_IMAGE_FORMATS:
+            raise ValueError(f"Unsupported QR image format: {image_format}")
+        digest = self.digest(payload)
+        key = (digest, image_format)
+        data = self._memory.get(key)
+        if data is not None:
+            return data
+
+        path = self.root / digest[:2] / f"{digest}.{image_format}"
+        data = await asyncio.to_thread(_read, path)
+        if data is None:
+            data = await cpu_executor.run_task("qr_code", generate_qr_image, payload, image_format)
+            await asyncio.to_thread(_write, path, data)
+            self.renders += 1
+        else:
+            self.disk_hits += 1
+        self._memory.set(key, data)
+        return data
+
+    def stats(self) -> dict:
+        return {**self._memory.stats(), "disk_hits": self.disk_hits, "renders": self.renders}
+
+
+qr_cache = QRCodeCache(QR_CACHE_PATH, QR_CACHE_SIZE)
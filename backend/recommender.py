@@ -0,0 +1,283 @@
+from datetime import datetime, timezone
+from typing import Any, Dict, Iterable, List, Optional
+import asyncio
+import logging
+import os
+import time
+
+import numpy as np
+
+from cache import LRUCache
+from metrics import LatencyHistogram
+
+logger = logging.getLogger(__name__)
+
+RECOMMENDER_REFRESH_SECONDS = float(os.environ.get("RECOMMENDER_REFRESH_SECONDS", "60"))
+RECOMMENDATION_CACHE_SIZE = int(os.environ.get("RECOMMENDATION_CACHE_SIZE", "10000"))
+RECOMMENDATION_CACHE_TTL = float(os.environ.get("RECOMMENDATION_CACHE_TTL", "300"))
+
+# Score weights; they add up to 100 for a perfect candidate
+CATEGORY_WEIGHT = 40.0
+COLLEGE_WEIGHT = 30.0
+RATING_WEIGHT = 20.0
+POPULARITY_WEIGHT = 10.0
+POPULARITY_CAP = 50.0
+
+# Only the fields the scorer reads are loaded from MongoDB
+CANDIDATE_PROJECTION = {
+    "_id": 0, "id": 1, "category": 1, "college": 1, "date": 1,
+    "average_rating": 1, "current_registrations": 1,
+}
+
+
+def _timestamp(value) -> float:
+    """Epoch seconds for a (naive UTC) event date; NaN never counts as upcoming"""
+    if not isinstance(value, datetime):
+        return float("nan")
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return value.timestamp()
+
+
+class CandidateIndex:
+    """Events held column-wise in NumPy arrays for vectorized scoring.
+
+    Each event owns one slot; slots of deleted events are reused. Category and
+    college strings are dictionary-encoded so matching is an integer compare.
+    Not thread-safe; it is meant to be used from the event loop only.
+    """
+
+    def __init__(self, capacity: int = 1024):
+        self._slots: Dict[str, int] = {}
+        self._ids: List[Optional[str]] = []
+        self._free: List[int] = []
+        self._categories: Dict[str, int] = {}
+        self._colleges: Dict[str, int] = {}
+        self._allocate(capacity)
+        self.loaded_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    def _allocate(self, capacity: int):
+        self.category = np.zeros(capacity, dtype=np.int32)
+        self.college = np.full(capacity, -1, dtype=np.int32)
+        self.rating = np.zeros(capacity, dtype=np.float32)
+        self.registrations = np.zeros(capacity, dtype=np.float32)
+        self.date = np.full(capacity, np.nan, dtype=np.float64)
+        self.valid = np.zeros(capacity, dtype=bool)
+
+    def _grow(self):
+        old = len(self.valid)
+        for name, fill in (("category", 0), ("college", -1), ("rating", 0), ("registrations", 0), ("date", np.nan), ("valid", False)):
+            array = getattr(self, name)
+            grown = np.full(old * 2, fill, dtype=array.dtype)
+            grown[:old] = array
+            setattr(self, name, grown)
+
+    @staticmethod
+    def _code(codes: Dict[str, int], value: str) -> int:
+        return codes.setdefault(value, len(codes))
+
+    def _slot(self, event_id: str) -> int:
+        slot = self._slots.get(event_id)
+        if slot is not None:
+            return slot
+        if self._free:
+            slot = self._free.pop()
+            self._ids[slot] = event_id
+        else:
+            slot = len(self._ids)
+            if slot == len(self.valid):
+                self._grow()
+            self._ids.append(event_id)
+        self._slots[event_id] = slot
+        return slot
+
+    def upsert(self, event: dict):
+        """Insert or overwrite one event's candidate columns"""
+        slot = self._slot(event["id"])
+        self.category[slot] = self._code(self._categories, event.get("category", "General"))
+        self.college[slot] = self._code(self._colleges, event.get("college", ""))
+        self.rating[slot] = event.get("average_rating") or 0.0
+        self.registrations[slot] = event.get("current_registrations") or 0
+        self.date[slot] = _timestamp(event.get("date"))
+        self.valid[slot] = True
+
+    def remove(self, event_id: str):
+        slot = self._slots.pop(event_id, None)
+        if slot is None:
+            return
+        self.valid[slot] = False
+        self.date[slot] = np.nan
+        self._ids[slot] = None
+        self._free.append(slot)
+
+    def adjust_registrations(self, event_id: str, delta: int):
+        slot = self._slots.get(event_id)
+        if slot is not None:
+            self.registrations[slot] += delta
+
+    def set_rating(self, event_id: str, average_rating: float):
+        slot = self._slots.get(event_id)
+        if slot is not None:
+            self.rating[slot] = average_rating or 0.0
+
+    def is_upcoming(self, event_id: str, now: datetime) -> bool:
+        slot = self._slots.get(event_id)
+        return slot is not None and bool(self.date[slot] > _timestamp(now))
+
+    def load(self, events: Iterable[dict]):
+        """Replace the whole index with ``events``"""
+        self._slots.clear()
+        self._ids.clear()
+        self._free.clear()
+        self._allocate(len(self.valid))
+        for event in events:
+            self.upsert(event)
+        self.loaded_at = time.monotonic()
+
+    async def refresh(self, db):
+        """Reload upcoming events, picking up writes made by other workers"""
+        async with self._lock:
+            events = await db.events.find(
+                {"date": {"$gt": datetime.utcnow()}}, CANDIDATE_PROJECTION
+            ).to_list(None)
+            self.load(events)
+        logger.info(f"Recommendation index loaded with {len(events)} upcoming events")
+
+    async def ensure_loaded(self, db):
+        if self.loaded_at is None:
+            await self.refresh(db)
+
+    async def refresh_forever(self, db, interval: float = RECOMMENDER_REFRESH_SECONDS):
+        while True:
+            try:
+                await self.refresh(db)
+            except Exception as e:
+                logger.error(f"Failed to refresh recommendation index: {str(e)}")
+            await asyncio.sleep(interval)
+
+    def top_k(
+        self,
+        preferred_categories: Dict[str, int],
+        student_college: str,
+        exclude_ids: Iterable[str],
+        now: datetime,
+        k: int = 10,
+    ) -> List[str]:
+        """Ids of the ``k`` best upcoming events, best first.
+
+        ``preferred_categories`` maps category -> number of the student's
+        registrations in it; the category score is that count's share.
+        """
+        n = len(self._ids)
+        if n == 0 or k <= 0:
+            return []
+
+        category_scores = np.zeros(len(self._categories) or 1, dtype=np.float32)
+        registered_total = sum(preferred_categories.values())
+        for category, count in preferred_categories.items():
+            code = self._categories.get(category)
+            if code is not None:
+                category_scores[code] = CATEGORY_WEIGHT * count / registered_total
+        scores = category_scores[self.category[:n]]
+
+        college_code = self._colleges.get(student_college)
+        if college_code is not None:
+            scores += COLLEGE_WEIGHT * (self.college[:n] == college_code)
+        scores += (RATING_WEIGHT / 5.0) * self.rating[:n]
+        scores += POPULARITY_WEIGHT * np.clip(self.registrations[:n] / POPULARITY_CAP, 0.0, 1.0)
+
+        eligible = self.valid[:n] & (self.date[:n] > _timestamp(now))
+        for event_id in exclude_ids:
+            slot = self._slots.get(event_id)
+            if slot is not None:
+                eligible[slot] = False
+        candidates = np.flatnonzero(eligible)
+        if len(candidates) == 0:
+            return []
+
+        scores = scores[candidates]
+        k = min(k, len(candidates))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [self._ids[slot] for slot in candidates[top]]
+
+    def stats(self) -> dict:
+        return {
+            "events": len(self._slots),
+            "capacity": len(self.valid),
+            "categories": len(self._categories),
+            "colleges": len(self._colleges),
+            "age_seconds": round(time.monotonic() - self.loaded_at, 1) if self.loaded_at is not None else None,
+        }
+
+
+class RecommendationCache:
+    """Per-student recommendation results until TTL or a relevant write.
+
+    A student's entry is dropped when they register or cancel. A change to
+    the candidate events (created, edited, deleted or rated) can move an
+    event into lists that don't hold it yet, so it starts a new generation
+    and drops every entry; scoping that by category or college would still
+    miss students ranked mostly on rating and popularity. Seat counts only
+    nudge popularity and are left to the TTL. A result is not stored if its
+    student was invalidated, or a new generation began, while it was being
+    computed (pass ``begin()`` to ``put``).
+    """
+
+    def __init__(self, maxsize: int, ttl: float):
+        self._cache = LRUCache(maxsize=maxsize, ttl=ttl)
+        # Clock at each student's last invalidation; bounded by starting a
+        # new generation, after which results begun before it are not stored
+        self._clock = 0
+        self._generation = 0
+        self._log_size = maxsize
+        self._students_invalidated: Dict[str, int] = {}
+        self.generations = 0
+        self.discarded = 0
+        self.recompute_latency = LatencyHistogram()
+
+    def get(self, student_id: str) -> Optional[Any]:
+        return self._cache.get(student_id)
+
+    def begin(self) -> int:
+        """Token for ``put``, read before computing a result"""
+        return self._clock
+
+    def put(self, student_id: str, result: Any, started: int, seconds: float):
+        """Store ``result`` unless its student or the candidates changed since ``begin()``"""
+        self.recompute_latency.observe(seconds)
+        if started < self._generation or self._students_invalidated.get(student_id, 0) > started:
+            self.discarded += 1
+            return
+        self._cache.set(student_id, result)
+
+    def _next_generation(self):
+        self._clock += 1
+        self._generation = self._clock
+        self._students_invalidated.clear()
+
+    def invalidate_student(self, student_id: str):
+        self._cache.pop(student_id)
+        if len(self._students_invalidated) >= self._log_size:
+            self._next_generation()
+        else:
+            self._clock += 1
+            self._students_invalidated[student_id] = self._clock
+
+    def invalidate_candidates(self):
+        self._next_generation()
+        self._cache.clear()
+        self.generations += 1
+
+    def stats(self) -> dict:
+        return {
+            **self._cache.stats(),
+            "generations": self.generations,
+            "discarded": self.discarded,
+            "recompute_latency": self.recompute_latency.snapshot(),
+        }
+
+
+candidate_index = CandidateIndex()
+recommendation_cache = RecommendationCache(RECOMMENDATION_CACHE_SIZE, RECOMMENDATION_CACHE_TTL)
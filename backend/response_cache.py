@@ -0,0 +1,203 @@
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+from typing import Awaitable, Callable, Dict, Iterable, List, Optional, Set, Tuple
+import asyncio
+import json
+import logging
+import os
+
+from cache import LRUCache
+
+logger = logging.getLogger(__name__)
+
+RESPONSE_CACHE_BACKEND = os.environ.get("RESPONSE_CACHE_BACKEND", "memory")  # "memory" or "mongodb"
+RESPONSE_CACHE_SIZE = int(os.environ.get("RESPONSE_CACHE_SIZE", "2048"))
+RESPONSE_CACHE_TTL = float(os.environ.get("RESPONSE_CACHE_TTL", "60"))
+
+# (body, headers) of a cached response
+CachedResponse = Tuple[bytes, Dict[str, str]]
+
+
+def cache_key(prefix: str, **params) -> str:
+    """Stable key from query parameters; None values are left out"""
+    return f"{prefix}:" + json.dumps({k: v for k, v in params.items() if v is not None}, sort_keys=True, separators=(",", ":"))
+
+
+class ResponseCacheBackend(ABC):
+    """Storage for rendered responses, each carrying invalidation tags"""
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        """The cached response, or None on a miss"""
+
+    @abstractmethod
+    async def set(self, key: str, value: CachedResponse, tags: Iterable[str]):
+        """Store ``value`` under ``key``, dropped when any of ``tags`` is invalidated"""
+
+    @abstractmethod
+    async def invalidate(self, tags: Iterable[str]) -> int:
+        """Drop every entry carrying one of ``tags``; returns how many"""
+
+    def stats(self) -> dict:
+        return {}
+
+
+class MemoryResponseCache(ResponseCacheBackend):
+    """Per-worker LRU; other workers' writes are only seen after the TTL"""
+
+    def __init__(self, maxsize: int = RESPONSE_CACHE_SIZE, ttl: float = RESPONSE_CACHE_TTL):
+        self._cache = LRUCache(maxsize=maxsize, ttl=ttl, on_evict=self._forget)
+        self._tagged: Dict[str, Set[str]] = {}
+
+    def _forget(self, key: str, entry: tuple):
+        for tag in entry[1]:
+            keys = self._tagged.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tagged[tag]
+
+    def _drop(self, key: str):
+        entry = self._cache.pop(key)
+        if entry is not None:
+            self._forget(key, entry)
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        entry = self._cache.get(key)
+        return entry[0] if entry is not None else None
+
+    async def set(self, key: str, value: CachedResponse, tags: Iterable[str]):
+        tags = list(tags)
+        self._drop(key)
+        self._cache.set(key, (value, tags))
+        for tag in tags:
+            self._tagged.setdefault(tag, set()).add(key)
+
+    async def invalidate(self, tags: Iterable[str]) -> int:
+        dropped = 0
+        for tag in tags:
+            for key in self._tagged.pop(tag, set()):
+                self._drop(key)
+                dropped += 1
+        return dropped
+
+    def stats(self) -> dict:
+        return {**self._cache.stats(), "tags": len(self._tagged)}
+
+
+class MongoResponseCache(ResponseCacheBackend):
+    """Shared across workers through the ``response_cache`` collection (TTL-indexed)"""
+
+    def __init__(self, db, ttl: float = RESPONSE_CACHE_TTL):
+        self.collection = db.response_cache
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        doc = await self.collection.find_one({"_id": key, "expires_at": {"$gt": datetime.utcnow()}})
+        if doc is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return bytes(doc["body"]), doc["headers"]
+
+    async def set(self, key: str, value: CachedResponse, tags: Iterable[str]):
+        body, headers = value
+        await self.collection.replace_one(
+            {"_id": key},
+            {"body": body, "headers": headers, "tags": list(tags), "expires_at": datetime.utcnow() + timedelta(seconds=self.ttl)},
+            upsert=True,
+        )
+
+    async def invalidate(self, tags: Iterable[str]) -> int:
+        result = await self.collection.delete_many({"tags": {"$in": list(tags)}})
+        return result.deleted_count
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0}
+
+
+class ResponseCache:
+    """Tag-invalidated response cache with single-flight misses.
+
+    Concurrent misses for one key share a single computation. A result
+    computed while one of its own tags was invalidated is returned but not
+    stored, so a write is never hidden behind a response rendered before it;
+    invalidations of unrelated tags do not hold it back.
+    """
+
+    def __init__(self, backend: ResponseCacheBackend):
+        self.backend = backend
+        self._inflight: Dict[str, asyncio.Future] = {}
+        # Tag -> clock at its last invalidation, kept only while computations are in flight
+        self._clock = 0
+        self._invalidated: Dict[str, int] = {}
+        self.coalesced = 0
+        self.discarded = 0
+
+    async def get_or_compute(
+        self,
+        key: str,
+        compute: Callable[[], Awaitable[Tuple[CachedResponse, List[str]]]],
+    ) -> CachedResponse:
+        """Cached response for ``key``, else ``compute()`` -> (response, tags)"""
+        try:
+            cached = await self.backend.get(key)
+        except Exception as e:
+            logger.error(f"Response cache read failed: {str(e)}")
+            cached = None
+        if cached is not None:
+            return cached
+
+        inflight = self._inflight.get(key)
+        if inflight is not None:
+            self.coalesced += 1
+            return await asyncio.shield(inflight)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        started = self._clock
+        try:
+            value, tags = await compute()
+            if all(self._invalidated.get(tag, 0) <= started for tag in tags):
+                try:
+                    await self.backend.set(key, value, tags)
+                except Exception as e:
+                    logger.error(f"Response cache write failed: {str(e)}")
+            else:
+                self.discarded += 1
+            future.set_result(value)
+            return value
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except Exception as e:
+            future.set_exception(e)
+            # Waiters get the error; keep it from being reported as never retrieved
+            future.exception()
+            raise
+        finally:
+            del self._inflight[key]
+            if not self._inflight:
+                self._invalidated.clear()
+
+    async def invalidate(self, *tags: str):
+        if self._inflight:
+            self._clock += 1
+            for tag in tags:
+                self._invalidated[tag] = self._clock
+        try:
+            await self.backend.invalidate(tags)
+        except Exception as e:
+            logger.error(f"Response cache invalidation failed: {str(e)}")
+
+    def stats(self) -> dict:
+        return {**self.backend.stats(), "inflight": len(self._inflight), "coalesced": self.coalesced, "discarded": self.discarded}
+
+
+def create_response_cache(db) -> ResponseCache:
+    if RESPONSE_CACHE_BACKEND == "mongodb":
+        return ResponseCache(MongoResponseCache(db))
+    return ResponseCache(MemoryResponseCache())
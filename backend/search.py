@@ -0,0 +1,62 @@
+from typing import Optional, Tuple
+from fastapi import HTTPException
+import re
+
+from pagination import decode_cursor, encode_cursor
+
+# Queries shorter than this fall back to an anchored prefix match on title;
+# the text index tokenizes whole words, so "ha" would never match "Hackathon".
+MIN_TEXT_SEARCH_LENGTH = 3
+
+TEXT_SCORE = {"$meta": "textScore"}
+
+
+def normalize_title(title: str) -> str:
+    """Stored as ``title_lower`` and matched by prefix searches (which are normalized the same way)"""
+    return " ".join(title.split()).lower()
+
+
+def event_search_filter(search: str) -> Tuple[dict, bool]:
+    """Build the events filter for ``search``; returns (filter, uses_text_index).
+
+    Text-index queries rank by relevance and are paged with
+    ``text_search_pipeline``; prefix queries use the indexed ``title_lower``
+    and keep the regular (date, id) ordering.
+    """
+    search = normalize_title(search)
+    if len(search) >= MIN_TEXT_SEARCH_LENGTH:
+        return {"$text": {"$search": search}}, True
+    # Case-sensitive and anchored, so the index bounds stay tight
+    return {"title_lower": {"$regex": f"^{re.escape(search)}"}}, False
+
+
+def text_search_pipeline(query: dict, cursor: Optional[str], limit: int, projection: dict) -> list:
+    """Aggregation for one page of a ``$text`` query in (score desc, date, id) order.
+
+    Fetches ``limit + 1`` documents like the keyset listing; the page after
+    them is resumed from ``text_search_cursor`` of the last one kept.
+    """
+    pipeline = [{"$match": query}, {"$addFields": {"score": TEXT_SCORE}}]
+    if cursor:
+        sort_value, doc_id = decode_cursor(cursor)
+        if not isinstance(sort_value, list) or len(sort_value) != 2:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        score, date = sort_value
+        pipeline.append({"$match": {"$or": [
+            {"score": {"$lt": score}},
+            {"score": score, "date": {"$gt": date}},
+            {"score": score, "date": date, "id": {"$gt": doc_id}},
+        ]}})
+    return pipeline + [
+        {"$sort": {"score": -1, "date": 1, "id": 1}},
+        {"$limit": limit + 1},
+        {"$project": projection},
+    ]
+
+
+def text_search_cursor(docs: list, limit: int) -> Optional[str]:
+    """Cursor for the text-search page after ``docs``, or None when it was the last"""
+    if len(docs) <= limit:
+        return None
+    last = docs[limit - 1]
+    return encode_cursor([last["score"], last.get("date")], last["id"])
@@ -1,4 +1,4 @@
-from fastapi import FastAPI, HTTPException, Depends, status
+from fastapi import FastAPI, HTTPException, Depends, Query, Response, status
 from fastapi.responses import JSONResponse
 from fastapi.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
@@ -12,6 +12,13 @@ from dotenv import load_dotenv
 import logging
 import uuid
 
+from executor import cpu_executor
+from pagination import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER,
+    keyset_query, keyset_sort, next_cursor
+)
+from search import event_search_filter, normalize_title, text_search_cursor, text_search_pipeline
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -71,6 +78,9 @@ class TokenResponse(BaseModel):
     token_type: str = "bearer"
     user: UserResponse
 
+# List endpoints never load the inline event image
+EVENT_LIST_PROJECTION = {"image": 0}
+
 # ===== UTILITY FUNCTIONS =====
 def hash_password(password: str) -> str:
     """Hash a password using bcrypt"""
@@ -81,6 +91,15 @@ def verify_password(password: str, hashed: str) -> bool:
     """Verify password against hash"""
     return bcrypt.checkpw(password.encode(), hashed.encode())
 
+async def hash_password_async(password: str) -> str:
+    """Hash a password on the CPU executor instead of the event loop"""
+    hashed = await cpu_executor.run_task("password_hash", bcrypt.hashpw, password.encode(), bcrypt.gensalt())
+    return hashed.decode()
+
+async def verify_password_async(password: str, hashed: str) -> bool:
+    """Verify a password on the CPU executor instead of the event loop"""
+    return await cpu_executor.run_task("password_verify", bcrypt.checkpw, password.encode(), hashed.encode())
+
 def create_access_token(data: dict, expires_days: int = ACCESS_TOKEN_EXPIRE_DAYS):
     """Create JWT token"""
     to_encode = data.copy()
@@ -125,7 +144,7 @@ async def register(user_data: UserCreate):
         
         # Create new user
         user_id = str(uuid.uuid4())
-        hashed_password = hash_password(user_data.password)
+        hashed_password = await hash_password_async(user_data.password)
         
         user_dict = {
             "id": user_id,
@@ -183,7 +202,7 @@ async def login(credentials: UserLogin):
             raise HTTPException(status_code=401, detail="Invalid email or password")
         
         # Verify password
-        if not verify_password(credentials.password, user["password"]):
+        if not await verify_password_async(credentials.password, user["password"]):
             logger.warning(f"Invalid password for: {credentials.email}")
             raise HTTPException(status_code=401, detail="Invalid email or password")
         
@@ -223,6 +242,11 @@ async def health_check():
         logger.error(f"Database connection failed: {str(e)}")
         return {"status": "unhealthy", "service": "JoinUp API", "database": "disconnected"}
 
+@app.get("/metrics")
+async def get_metrics():
+    """Runtime metrics for in-process executors and caches"""
+    return {"cpu_executor": cpu_executor.metrics()}
+
 # ===== TEST ROUTE =====
 @app.get("/api/test")
 async def test_route():
@@ -231,17 +255,36 @@ async def test_route():
 
 # ===== EVENTS ROUTES =====
 @app.get("/api/events")
-async def get_events(search: str = None, current_user: dict = None):
-    """Get all events with optional search"""
+async def get_events(
+    response: Response,
+    search: str = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    current_user: dict = None,
+):
+    """Get events with optional search, paginated via X-Next-Cursor.
+
+    Searches of 3+ characters are ranked by text-index relevance, then
+    (date, id); everything else is ordered by (date, id).
+    """
+    query = {}
+    text_search = False
+    if search:
+        query, text_search = event_search_filter(search)
+    if text_search:
+        pipeline = text_search_pipeline(query, cursor, limit, EVENT_LIST_PROJECTION)
+    else:
+        query = keyset_query(query, "date", cursor)
+    
     try:
-        query = {}
-        if search:
-            query["$or"] = [
-                {"title": {"$regex": search, "$options": "i"}},
-                {"description": {"$regex": search, "$options": "i"}}
-            ]
-        
-        events = await db.events.find(query).to_list(100)
+        if text_search:
+            events = await db.events.aggregate(pipeline).to_list(limit + 1)
+            cursor_out = text_search_cursor(events, limit)
+        else:
+            events = await db.events.find(query, EVENT_LIST_PROJECTION).sort(keyset_sort("date")).limit(limit + 1).to_list(limit + 1)
+            cursor_out = next_cursor(events, "date", limit)
+        if cursor_out:
+            response.headers[NEXT_CURSOR_HEADER] = cursor_out
         return [
             {
                 "id": event.get("id", str(event.get("_id"))),
@@ -256,7 +299,7 @@ async def get_events(search: str = None, current_user: dict = None):
                 "current_registrations": event.get("current_registrations", 0),
                 "max_participants": event.get("max_participants"),
             }
-            for event in events
+            for event in events[:limit]
         ]
     except Exception as e:
         logger.error(f"Error fetching events: {str(e)}")
@@ -309,7 +352,7 @@ async def get_organizer_events(current_user: dict = None):
             raise HTTPException(status_code=401, detail="Not authenticated")
         
         organizer_id = current_user.get("sub")
-        events = await db.events.find({"organizer_id": organizer_id}).to_list(None)
+        events = await db.events.find({"organizer_id": organizer_id}, EVENT_LIST_PROJECTION).to_list(None)
         
         return [
             {
@@ -334,6 +377,7 @@ async def create_event(event_data: dict):
         event_dict = {
             "id": str(uuid.uuid4()),
             "title": event_data.get("title", ""),
+            "title_lower": normalize_title(event_data.get("title", "")),
             "description": event_data.get("description", ""),
             "date": event_data.get("date", ""),
             "venue": event_data.get("venue", ""),
@@ -412,6 +456,7 @@ async def startup_event():
 async def shutdown_event():
     logger.info("Shutting down...")
     client.close()
+    cpu_executor.shutdown()
 
 if __name__ == "__main__":
     import uvicorn
@@ -10,6 +10,8 @@ import os
 from dotenv import load_dotenv
 import logging
 
+from executor import cpu_executor
+
 # Setup logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -79,6 +81,15 @@ def verify_password(password: str, hashed: str) -> bool:
     """Verify password against hash"""
     return bcrypt.checkpw(password.encode(), hashed.encode())
 
+async def hash_password_async(password: str) -> str:
+    """Hash a password on the CPU executor instead of the event loop"""
+    hashed = await cpu_executor.run_task("password_hash", bcrypt.hashpw, password.encode(), bcrypt.gensalt())
+    return hashed.decode()
+
+async def verify_password_async(password: str, hashed: str) -> bool:
+    """Verify a password on the CPU executor instead of the event loop"""
+    return await cpu_executor.run_task("password_verify", bcrypt.checkpw, password.encode(), hashed.encode())
+
 def create_access_token(data: dict, expires_days: int = ACCESS_TOKEN_EXPIRE_DAYS):
     """Create JWT token"""
     to_encode = data.copy()
@@ -114,7 +125,7 @@ async def register(user_data: UserCreate):
         # Create new user
         import uuid
         user_id = str(uuid.uuid4())
-        hashed_password = hash_password(user_data.password)
+        hashed_password = await hash_password_async(user_data.password)
         
         user_dict = {
             "id": user_id,
@@ -172,7 +183,7 @@ async def login(credentials: UserLogin):
             raise HTTPException(status_code=401, detail="Invalid email or password")
         
         # Verify password
-        if not verify_password(credentials.password, user["password"]):
+        if not await verify_password_async(credentials.password, user["password"]):
             logger.warning(f"Invalid password for: {credentials.email}")
             raise HTTPException(status_code=401, detail="Invalid email or password")
         
@@ -232,6 +243,7 @@ async def startup_event():
 async def shutdown_event():
     logger.info("Shutting down...")
     client.close()
+    cpu_executor.shutdown()
 
 if __name__ == "__main__":
     import uvicorn
@@ -1,27 +1,52 @@
-from fastapi import FastAPI, APIRouter, Depends, HTTPException, status
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import JSONResponse, StreamingResponse
 from dotenv import load_dotenv
+from pydantic import TypeAdapter
 from starlette.middleware.cors import CORSMiddleware
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
 import os
 import logging
 from pathlib import Path
-from typing import List, Optional
+from typing import List, Optional, Tuple
 import uuid
-from datetime import datetime, timedelta
+import base64
+import asyncio
+import time
+from datetime import datetime, timedelta, timezone
 
 from models import (
     UserCreate, UserLogin, User, TokenResponse, UserRole,
-    EventCreate, Event, RegistrationCreate, Registration,
-    AttendanceMarkRequest, CertificateIssueRequest, Certificate,
-    StudentDashboard, PaymentStatus, RatingCreate, Rating,
-    OrganizerAnalytics
+    EventCreate, Event, EventSummary, RegistrationCreate, Registration,
+    AttendanceMarkRequest, AttendanceSyncRequest, AttendanceScanResult, AttendanceScanStatus, AttendanceSyncResult,
+    CertificateIssueRequest, Certificate, CertificateSummary,
+    StudentDashboard, PaymentStatus, RatingCreate, Rating, WaitlistEntry,
+    OrganizerAnalytics, CertificateJob
 )
 from auth import (
-    get_password_hash, verify_password, create_access_token,
-    get_current_user, require_role
+    get_password_hash_async, verify_password_async, create_access_token,
+    get_current_user, require_role, token_cache
 )
-from utils import generate_qr_code, generate_certificate_pdf
+from utils import QR_IMAGE_FORMATS, generate_certificate_pdf_async
+from qrcache import qr_cache
+from tickets import TICKET_PREFIX, event_ticket_key, issue_ticket, ticket_expired, ticket_expiry, verify_ticket
+from cache import LRUCache
+from blobstore import create_blob_store, decode_base64_blob, etag_matches, stream_blob
+from executor import cpu_executor
+from pagination import (
+    DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE, NEXT_CURSOR_HEADER,
+    keyset_query, keyset_sort, next_cursor
+)
+from search import event_search_filter, normalize_title, text_search_cursor, text_search_pipeline
+from aggregations import add_rating_update, organizer_analytics_pipeline, student_dashboard_pipeline
+from recommender import candidate_index, recommendation_cache
+from certificate_jobs import create_certificate_job, resume_certificate_jobs_forever
+from similarity import merge_neighbor_lists, refresh_neighbors_forever
+from etags import ConditionalGetMiddleware, body_etag, resource_versions
+from response_cache import cache_key, create_response_cache
+from livefeed import LiveFeed, server_sent_events
+from checkin import ROSTER_TOMBSTONE_DAYS, checkin_rosters, gzip_ndjson, roster_records, roster_version
 
 ROOT_DIR = Path(__file__).parent
 load_dotenv(ROOT_DIR / '.env')
@@ -31,6 +56,8 @@ mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
 db_name = os.environ.get('DB_NAME', 'joinup')
 client = AsyncIOMotorClient(mongo_url)
 db = client[db_name]
+blob_store = create_blob_store(db)
+response_cache = create_response_cache(db)
 
 # Create the main app without a prefix
 app = FastAPI(
@@ -39,6 +66,9 @@ app = FastAPI(
     description="Digital Event & Student Engagement Platform"
 )
 
+# 304s for unchanged reads; added before CORS so CORS headers wrap its responses too
+app.add_middleware(ConditionalGetMiddleware, get_db=lambda: db)
+
 # Add CORS middleware FIRST - before routes
 app.add_middleware(
     CORSMiddleware,
@@ -59,6 +89,20 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# List endpoints never load inline blobs; they are served by the detail routes
+EVENT_LIST_PROJECTION = {"image": 0}
+EVENT_SUMMARY_LIST = TypeAdapter(List[EventSummary])
+CERTIFICATE_LIST_PROJECTION = {"certificate_data": 0}
+
+# Matches events that still have a free seat (no max_participants means unlimited)
+HAS_FREE_SEAT = {"$or": [
+    {"max_participants": {"$in": [None, 0]}},
+    {"$expr": {"$lt": ["$current_registrations", "$max_participants"]}},
+]}
+
+# Events never change organizer, so ownership checks can be answered from memory
+event_organizers = LRUCache(maxsize=int(os.environ.get("EVENT_ORGANIZER_CACHE_SIZE", 10000)))
+
 # ============= UTILITY FUNCTIONS =============
 async def get_or_404(collection, query, message: str = "Resource not found"):
     """Helper to get document or raise 404"""
@@ -67,6 +111,156 @@ async def get_or_404(collection, query, message: str = "Resource not found"):
         raise HTTPException(status_code=404, detail=message)
     return doc
 
+async def store_event_image(event_dict: dict):
+    """Move a base64 ``image`` from the payload into the blob store"""
+    image = event_dict.pop("image", None)
+    if image:
+        data, content_type = decode_base64_blob(image)
+        event_dict["image_key"] = await blob_store.put(data)
+        event_dict["image_content_type"] = content_type
+    else:
+        event_dict["image_key"] = None
+        event_dict["image_content_type"] = None
+
+async def with_certificate_data(cert: dict) -> dict:
+    """Fill in base64 ``certificate_data`` from the blob store for JSON responses"""
+    if not cert.get("certificate_data") and cert.get("certificate_key"):
+        pdf = await blob_store.get(cert["certificate_key"])
+        if pdf is None:
+            raise HTTPException(status_code=404, detail="Certificate file not found")
+        cert["certificate_data"] = base64.b64encode(pdf).decode()
+    return cert
+
+async def event_organizer(event_id: str) -> Optional[str]:
+    organizer_id = event_organizers.get(event_id)
+    if organizer_id is None:
+        event = await db.events.find_one({"id": event_id}, {"organizer_id": 1})
+        if not event:
+            return None
+        organizer_id = event["organizer_id"]
+        event_organizers.set(event_id, organizer_id)
+    return organizer_id
+
+async def event_live_counts(event_id: str) -> Optional[dict]:
+    """Counters pushed by GET /events/{event_id}/live; None once the event is gone"""
+    event = await db.events.find_one(
+        {"id": event_id}, {"_id": 0, "current_registrations": 1, "max_participants": 1, "waitlist_count": 1}
+    )
+    if not event:
+        return None
+    attended = await db.registrations.count_documents({"event_id": event_id, "attendance_marked": True})
+    return {
+        "registrations": event.get("current_registrations", 0),
+        "capacity": event.get("max_participants"),
+        "waitlist": event.get("waitlist_count", 0),
+        # Scans accepted here but not flushed yet
+        "attended": attended + checkin_rosters.pending_count(event_id),
+    }
+
+live_feed = LiveFeed(event_live_counts)
+
+def new_registration(student_id: str, student_name: str, event_id: str, event_title: str, event_date: Optional[datetime] = None) -> dict:
+    reg_id = str(uuid.uuid4())
+    now = datetime.utcnow()
+    return {
+        "id": reg_id,
+        "student_id": student_id,
+        "student_name": student_name,
+        "event_id": event_id,
+        "event_title": event_title,
+        "payment_status": PaymentStatus.PAID,  # Mock payment
+        "qr_code_data": issue_ticket(reg_id, event_id, ticket_expiry(event_date)),
+        "attendance_marked": False,
+        "attendance_time": None,
+        "certificate_issued": False,
+        "created_at": now,
+        "roster_updated_at": now,
+    }
+
+async def waitlist_position(entry: dict) -> int:
+    return await db.waitlist.count_documents({"event_id": entry["event_id"], "seq": {"$lt": entry["seq"]}}) + 1
+
+async def promote_from_waitlist(event_id: str, seat_claimed: bool = False) -> int:
+    """Move students from the head of the waitlist into free seats.
+
+    With ``seat_claimed`` the caller already holds a seat (e.g. from a
+    cancellation) that is handed over directly, so it is never visible as
+    free to other clients. Returns the number of students promoted.
+    """
+    promoted = 0
+    while True:
+        if not seat_claimed:
+            claimed = await db.events.find_one_and_update(
+                {"id": event_id, "waitlist_count": {"$gt": 0}, **HAS_FREE_SEAT},
+                {"$inc": {"current_registrations": 1}},
+                projection={"_id": 1},
+            )
+            if not claimed:
+                return promoted
+            candidate_index.adjust_registrations(event_id, 1)
+        seat_claimed = False
+        
+        entry = await db.waitlist.find_one_and_delete({"event_id": event_id}, sort=[("seq", 1)])
+        if not entry:
+            # Nobody waiting: release the seat, unless someone queued up meanwhile
+            event = await db.events.find_one_and_update(
+                {"id": event_id},
+                {"$inc": {"current_registrations": -1}},
+                projection={"waitlist_count": 1},
+                return_document=ReturnDocument.AFTER,
+            )
+            candidate_index.adjust_registrations(event_id, -1)
+            await event_changed(event_id)
+            if not event or not event.get("waitlist_count"):
+                return promoted
+            continue
+        
+        await db.events.update_one({"id": event_id}, {"$inc": {"waitlist_count": -1}})
+        try:
+            await db.registrations.insert_one(
+                new_registration(entry["student_id"], entry["student_name"], event_id, entry["event_title"], entry.get("event_date"))
+            )
+            promoted += 1
+            recommendation_cache.invalidate_student(entry["student_id"])
+            live_feed.nudge(event_id)
+            await event_changed(event_id)
+            await resource_versions.bump(db, f"registrations:{entry['student_id']}")
+            logger.info(f"Promoted {entry['student_id']} from waitlist of event {event_id}")
+        except DuplicateKeyError:
+            # Already registered by other means; the seat goes to the next in line
+            seat_claimed = True
+
+async def join_waitlist(event: dict, student_id: str, student_name: str) -> dict:
+    """Append the student to the event's waitlist (idempotent)"""
+    entry = await db.waitlist.find_one({"event_id": event["id"], "student_id": student_id})
+    if not entry:
+        counter = await db.events.find_one_and_update(
+            {"id": event["id"]},
+            {"$inc": {"waitlist_seq": 1, "waitlist_count": 1}},
+            projection={"waitlist_seq": 1},
+            return_document=ReturnDocument.AFTER,
+        )
+        entry = {
+            "id": str(uuid.uuid4()),
+            "event_id": event["id"],
+            "event_title": event["title"],
+            "event_date": event.get("date"),
+            "student_id": student_id,
+            "student_name": student_name,
+            "seq": counter["waitlist_seq"],
+            "created_at": datetime.utcnow(),
+        }
+        try:
+            await db.waitlist.insert_one(entry)
+        except DuplicateKeyError:
+            await db.events.update_one({"id": event["id"]}, {"$inc": {"waitlist_count": -1}})
+            entry = await db.waitlist.find_one({"event_id": event["id"], "student_id": student_id})
+        # A seat may have been released while we were queueing
+        await promote_from_waitlist(event["id"])
+    live_feed.nudge(event["id"])
+    await event_changed(event["id"])
+    return entry
+
 # ============= AUTH ROUTES =============
 @api_router.post("/auth/register", response_model=TokenResponse)
 async def register(user_data: UserCreate):
@@ -83,7 +277,7 @@ async def register(user_data: UserCreate):
         
         # Create user
         user_dict = user_data.model_dump()
-        user_dict["password"] = get_password_hash(user_data.password)
+        user_dict["password"] = await get_password_hash_async(user_data.password)
         user_dict["id"] = str(uuid.uuid4())
         user_dict["is_approved"] = True  # Auto-approve for MVP
         user_dict["created_at"] = datetime.utcnow()
@@ -109,7 +303,7 @@ async def login(credentials: UserLogin):
     """Login user"""
     try:
         user = await db.users.find_one({"email": credentials.email})
-        if not user or not verify_password(credentials.password, user["password"]):
+        if not user or not await verify_password_async(credentials.password, user["password"]):
             logger.warning(f"Failed login attempt for: {credentials.email}")
             raise HTTPException(status_code=401, detail="Invalid email or password")
         
@@ -146,34 +340,93 @@ async def create_event(
     organizer = await db.users.find_one({"id": current_user["sub"]})
     
     event_dict = event_data.model_dump()
+    await store_event_image(event_dict)
     event_dict["id"] = str(uuid.uuid4())
     event_dict["organizer_id"] = current_user["sub"]
     event_dict["organizer_name"] = organizer["name"]
     event_dict["current_registrations"] = 0
     event_dict["created_at"] = datetime.utcnow()
+    event_dict["title_lower"] = normalize_title(event_dict["title"])
     
     await db.events.insert_one(event_dict)
     del event_dict["_id"]
+    candidate_index.upsert(event_dict)
+    recommendation_cache.invalidate_candidates()
+    await event_changed(event_dict["id"], event_dict["college"])
     
     return Event(**event_dict)
 
-@api_router.get("/events", response_model=List[Event])
+@api_router.get("/events", response_model=List[EventSummary])
 async def get_events(
+    request: Request,
     search: str = None,
     college: str = None,
+    cursor: Optional[str] = None,
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
     current_user: dict = Depends(get_current_user)
 ):
+    """List events by (date, id); the next page's cursor is returned in X-Next-Cursor.
+
+    Searches of 3+ characters use the text index and are paged by relevance
+    (their cursors only resume the same search). Rendered pages are served from the
+    response cache until an event they depend on changes; the ETag hashes the
+    page itself, so it never vouches for a cached page that is out of date.
+    """
+    # Both search modes are case-insensitive and whitespace-insensitive
+    search = normalize_title(search) if search else None
+    key = cache_key("events", search=search or None, college=college, cursor=cursor, limit=limit)
+    body, headers = await response_cache.get_or_compute(key, lambda: list_events(search, college, cursor, limit))
+    if etag_matches(request, headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
+async def list_events(search: Optional[str], college: Optional[str], cursor: Optional[str], limit: int) -> Tuple[tuple, List[str]]:
     query = {}
+    text_search = False
     if search:
-        query["$or"] = [
-            {"title": {"$regex": search, "$options": "i"}},
-            {"description": {"$regex": search, "$options": "i"}}
-        ]
+        query, text_search = event_search_filter(search)
     if college:
         query["college"] = college
     
-    events = await db.events.find(query).sort("date", 1).to_list(1000)
-    return [Event(**{**event, "_id": str(event["_id"])}) for event in events]
+    headers = {}
+    if text_search:
+        events = await db.events.aggregate(text_search_pipeline(query, cursor, limit, EVENT_LIST_PROJECTION)).to_list(limit + 1)
+        cursor_out = text_search_cursor(events, limit)
+    else:
+        query = keyset_query(query, "date", cursor)
+        events = await db.events.find(query, EVENT_LIST_PROJECTION).sort(keyset_sort("date")).limit(limit + 1).to_list(limit + 1)
+        cursor_out = next_cursor(events, "date", limit)
+    if cursor_out:
+        headers[NEXT_CURSOR_HEADER] = cursor_out
+    summaries = events[:limit]
+    
+    body = EVENT_SUMMARY_LIST.dump_json([EventSummary(**event) for event in summaries])
+    headers["ETag"] = body_etag(body, headers.get(NEXT_CURSOR_HEADER, "").encode())
+    headers["Cache-Control"] = "private, no-cache"
+    # Entries drop when a listed event (including the look-ahead one) changes,
+    # or when an event may have entered the listing's filter
+    tags = [f"event:{event['id']}" for event in events] + [f"college:{college}" if college else "college:*"]
+    return (body, headers), tags
+
+async def event_changed(event_id: str, *colleges: str, organizer_id: Optional[str] = None):
+    """Call after writing an event or its counters.
+
+    Drops cached listings showing ``event_id`` (pass its college(s) when it
+    may move between pages) and bumps the ETag versions depending on it.
+    """
+    tags = [f"event:{event_id}"]
+    if colleges:
+        tags += ["college:*"] + [f"college:{college}" for college in colleges]
+    await response_cache.invalidate(*tags)
+    organizer_id = organizer_id or await event_organizer(event_id)
+    await resource_versions.bump(db, f"event:{event_id}", f"organizer:{organizer_id}" if organizer_id else None)
+
+async def event_students_changed(student_ids: List[str], certificates: bool = False):
+    """Bump the per-student versions of everyone registered for a changed event"""
+    scopes = [f"registrations:{student_id}" for student_id in student_ids]
+    if certificates:
+        scopes += [f"certificates:{student_id}" for student_id in student_ids]
+    await resource_versions.bump(db, *scopes)
 
 @api_router.get("/events/{event_id}", response_model=Event)
 async def get_event(event_id: str, current_user: dict = Depends(get_current_user)):
@@ -183,10 +436,41 @@ async def get_event(event_id: str, current_user: dict = Depends(get_current_user
     del event["_id"]
     return Event(**event)
 
-@api_router.get("/events/organizer/my-events", response_model=List[Event])
+@api_router.get("/events/{event_id}/live")
+async def get_event_live_feed(event_id: str, current_user: dict = Depends(get_current_user)):
+    """Server-Sent Events stream of registration, waitlist and attendance counters.
+
+    Each ``update`` carries the current counters and ``deltas`` against the
+    previous update; a ``deleted`` event ends the stream.
+    """
+    if await event_organizer(event_id) is None:
+        raise HTTPException(status_code=404, detail="Event not found")
+    return StreamingResponse(
+        server_sent_events(live_feed.subscribe(event_id)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+@api_router.get("/events/{event_id}/image")
+async def get_event_image(event_id: str, request: Request, current_user: dict = Depends(get_current_user)):
+    """Stream the event image from the blob store (ETag + Range aware)"""
+    event = await get_or_404(db.events, {"id": event_id}, "Event not found")
+    if event.get("image"):
+        # Not migrated to the blob store yet
+        data, content_type = decode_base64_blob(event["image"])
+        return Response(content=data, media_type=content_type)
+    if not event.get("image_key"):
+        raise HTTPException(status_code=404, detail="Event has no image")
+    # The URL outlives the image (update_event can replace it), so clients revalidate by ETag
+    return await stream_blob(
+        request, blob_store, event["image_key"], event.get("image_content_type") or "application/octet-stream",
+        cache_control="private, no-cache",
+    )
+
+@api_router.get("/events/organizer/my-events", response_model=List[EventSummary])
 async def get_my_events(current_user: dict = Depends(require_role([UserRole.ORGANIZER]))):
-    events = await db.events.find({"organizer_id": current_user["sub"]}).sort("date", -1).to_list(1000)
-    return [Event(**{**event, "_id": str(event["_id"])}) for event in events]
+    events = await db.events.find({"organizer_id": current_user["sub"]}, EVENT_LIST_PROJECTION).sort("date", -1).to_list(1000)
+    return [EventSummary(**event) for event in events]
 
 @api_router.put("/events/{event_id}")
 async def update_event(
@@ -200,13 +484,30 @@ async def update_event(
         event = await get_or_404(db.events, {"id": event_id, "organizer_id": current_user["sub"]}, "Event not found or access denied")
         
         update_data = event_data.model_dump()
+        await store_event_image(update_data)
+        update_data["title_lower"] = normalize_title(update_data["title"])
+        update = {"$set": update_data}
+        if "image" in event:
+            update["$unset"] = {"image": ""}
         await db.events.update_one(
             {"id": event_id},
-            {"$set": update_data}
+            update
         )
+        if event.get("max_participants") != update_data.get("max_participants"):
+            # Seats added by a higher (or removed) limit go to the waitlist
+            await promote_from_waitlist(event_id)
         
         updated_event = await db.events.find_one({"id": event_id})
         del updated_event["_id"]
+        candidate_index.upsert(updated_event)
+        recommendation_cache.invalidate_candidates()
+        live_feed.nudge(event_id)
+        await event_changed(event_id, event["college"], updated_event["college"])
+        if event.get("date") != updated_event.get("date"):
+            # Ticket expiry follows the date
+            checkin_rosters.invalidate(event_id)
+            # Student dashboards count upcoming events
+            await event_students_changed(await db.registrations.distinct("student_id", {"event_id": event_id}))
         return Event(**updated_event)
     except HTTPException:
         raise
@@ -224,11 +525,22 @@ async def delete_event(
         # Verify ownership
         event = await get_or_404(db.events, {"id": event_id, "organizer_id": current_user["sub"]}, "Event not found or access denied")
         
+        student_ids = await db.registrations.distinct("student_id", {"event_id": event_id})
+        
         # Delete related data
         await db.registrations.delete_many({"event_id": event_id})
+        await db.waitlist.delete_many({"event_id": event_id})
         await db.ratings.delete_many({"event_id": event_id})
         await db.certificates.delete_many({"event_id": event_id})
+        await db.registration_tombstones.delete_many({"event_id": event_id})
         await db.events.delete_one({"id": event_id})
+        candidate_index.remove(event_id)
+        event_organizers.pop(event_id)
+        checkin_rosters.invalidate(event_id)
+        live_feed.nudge(event_id)
+        recommendation_cache.invalidate_candidates()
+        await event_changed(event_id, organizer_id=event["organizer_id"])
+        await event_students_changed(student_ids, certificates=True)
         
         return {"message": "Event deleted successfully"}
     except HTTPException:
@@ -238,56 +550,74 @@ async def delete_event(
         raise HTTPException(status_code=500, detail="Failed to delete event")
 
 # ============= REGISTRATION ROUTES =============
-@api_router.post("/registrations", response_model=Registration)
+@api_router.post(
+    "/registrations",
+    response_model=Registration,
+    responses={202: {"model": WaitlistEntry, "description": "Event full, added to the waitlist"}},
+)
 async def register_for_event(
     reg_data: RegistrationCreate,
     current_user: dict = Depends(require_role([UserRole.STUDENT]))
 ):
-    # Check if event exists
-    event = await db.events.find_one({"id": reg_data.event_id})
-    if not event:
-        raise HTTPException(status_code=404, detail="Event not found")
-    
-    # Check if already registered
-    existing = await db.registrations.find_one({
-        "student_id": current_user["sub"],
-        "event_id": reg_data.event_id
-    })
+    # Duplicate check and student lookup are independent, run them together
+    existing, student = await asyncio.gather(
+        db.registrations.find_one(
+            {"student_id": current_user["sub"], "event_id": reg_data.event_id}, {"_id": 1}
+        ),
+        db.users.find_one({"id": current_user["sub"]}, {"name": 1}),
+    )
     if existing:
         raise HTTPException(status_code=400, detail="Already registered for this event")
+    if not student:
+        # Account deleted after the token was issued; check before taking a seat
+        raise HTTPException(status_code=404, detail="User not found")
     
-    # Check max participants
-    if event.get("max_participants") and event["current_registrations"] >= event["max_participants"]:
-        raise HTTPException(status_code=400, detail="Event is full")
-    
-    # Get student info
-    student = await db.users.find_one({"id": current_user["sub"]})
+    # Claim a seat atomically; this only matches while the event has capacity
+    # and nobody is queued for it, free seats go to the waitlist first
+    event = await db.events.find_one_and_update(
+        {"id": reg_data.event_id, "waitlist_count": {"$in": [None, 0]}, **HAS_FREE_SEAT},
+        {"$inc": {"current_registrations": 1}},
+        projection={"title": 1, "date": 1},
+    )
+    if not event:
+        event = await db.events.find_one({"id": reg_data.event_id}, {"id": 1, "title": 1, "date": 1, "waitlist_count": 1})
+        if not event:
+            raise HTTPException(status_code=404, detail="Event not found")
+        if not reg_data.join_waitlist:
+            if event.get("waitlist_count"):
+                await promote_from_waitlist(reg_data.event_id)
+            raise HTTPException(status_code=400, detail="Event is full")
+        
+        entry = await join_waitlist(event, current_user["sub"], student["name"])
+        registration = await db.registrations.find_one(
+            {"student_id": current_user["sub"], "event_id": reg_data.event_id}
+        )
+        if registration:
+            # Promoted straight away
+            del registration["_id"]
+            return Registration(**registration)
+        waitlisted = WaitlistEntry(**entry, position=await waitlist_position(entry))
+        return JSONResponse(status_code=status.HTTP_202_ACCEPTED, content=waitlisted.model_dump(mode="json"))
     
     # Create registration
-    reg_id = str(uuid.uuid4())
-    qr_data = f"joinup-{reg_id}"
-    
-    reg_dict = {
-        "id": reg_id,
-        "student_id": current_user["sub"],
-        "student_name": student["name"],
-        "event_id": reg_data.event_id,
-        "event_title": event["title"],
-        "payment_status": PaymentStatus.PAID,  # Mock payment
-        "qr_code_data": qr_data,
-        "attendance_marked": False,
-        "attendance_time": None,
-        "certificate_issued": False,
-        "created_at": datetime.utcnow()
-    }
-    
-    await db.registrations.insert_one(reg_dict)
+    reg_dict = new_registration(current_user["sub"], student["name"], reg_data.event_id, event["title"], event.get("date"))
     
-    # Update event registration count
-    await db.events.update_one(
-        {"id": reg_data.event_id},
-        {"$inc": {"current_registrations": 1}}
-    )
+    try:
+        await db.registrations.insert_one(reg_dict)
+    except Exception as e:
+        # Give the seat back so the counter never drifts above real registrations
+        await db.events.update_one(
+            {"id": reg_data.event_id},
+            {"$inc": {"current_registrations": -1}}
+        )
+        if isinstance(e, DuplicateKeyError):
+            raise HTTPException(status_code=400, detail="Already registered for this event")
+        raise
+    candidate_index.adjust_registrations(reg_data.event_id, 1)
+    recommendation_cache.invalidate_student(current_user["sub"])
+    live_feed.nudge(reg_data.event_id)
+    await event_changed(reg_data.event_id)
+    await resource_versions.bump(db, f"registrations:{current_user['sub']}")
     
     del reg_dict["_id"]
     return Registration(**reg_dict)
@@ -297,6 +627,36 @@ async def get_my_registrations(current_user: dict = Depends(require_role([UserRo
     registrations = await db.registrations.find({"student_id": current_user["sub"]}).sort("created_at", -1).to_list(1000)
     return [Registration(**{**reg, "_id": str(reg["_id"])}) for reg in registrations]
 
+@api_router.get("/registrations/{registration_id}/qr")
+async def get_registration_qr(
+    registration_id: str,
+    request: Request,
+    format: Optional[str] = Query(None, pattern="^(png|svg)$"),
+    current_user: dict = Depends(require_role([UserRole.STUDENT]))
+):
+    """The registration's QR code as PNG or SVG (``format``, else the Accept header).
+
+    QR payloads never change, so responses carry a strong ETag and may be
+    cached by the client indefinitely.
+    """
+    registration = await db.registrations.find_one(
+        {"id": registration_id, "student_id": current_user["sub"]}, {"qr_code_data": 1}
+    )
+    if not registration:
+        raise HTTPException(status_code=404, detail="Registration not found")
+    
+    image_format = format or ("svg" if "image/svg+xml" in request.headers.get("accept", "") else "png")
+    headers = {
+        "ETag": qr_cache.etag(registration["qr_code_data"], image_format),
+        "Cache-Control": "private, max-age=31536000, immutable",
+        "Vary": "Accept",
+    }
+    if etag_matches(request, headers["ETag"]):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+    
+    image = await qr_cache.get(registration["qr_code_data"], image_format)
+    return Response(content=image, media_type=QR_IMAGE_FORMATS[image_format], headers=headers)
+
 @api_router.delete("/registrations/{registration_id}")
 async def cancel_registration(
     registration_id: str,
@@ -306,17 +666,23 @@ async def cancel_registration(
     try:
         registration = await get_or_404(db.registrations, {"id": registration_id, "student_id": current_user["sub"]}, "Registration not found or access denied")
         
-        if registration["attendance_marked"]:
+        if registration["attendance_marked"] or checkin_rosters.is_attended(registration["event_id"], registration_id):
             raise HTTPException(status_code=400, detail="Cannot cancel - attendance already marked")
         
-        # Decrement event registrations
-        await db.events.update_one(
-            {"id": registration["event_id"]},
-            {"$inc": {"current_registrations": -1}}
-        )
-        
-        # Delete registration
-        await db.registrations.delete_one({"id": registration_id})
+        # Delete registration, then hand the freed seat to the waitlist (or release it)
+        result = await db.registrations.delete_one({"id": registration_id, "attendance_marked": False})
+        if result.deleted_count:
+            # Lets offline scanners drop the registration on their next delta sync
+            await db.registration_tombstones.insert_one({
+                "event_id": registration["event_id"],
+                "registration_id": registration_id,
+                "deleted_at": datetime.utcnow(),
+            })
+            checkin_rosters.remove(registration["event_id"], registration_id)
+            recommendation_cache.invalidate_student(current_user["sub"])
+            await resource_versions.bump(db, f"registrations:{current_user['sub']}")
+            await promote_from_waitlist(registration["event_id"], seat_claimed=True)
+            live_feed.nudge(registration["event_id"])
         
         return {"message": "Registration cancelled successfully"}
     except HTTPException:
@@ -325,6 +691,32 @@ async def cancel_registration(
         logger.error(f"Error cancelling registration: {str(e)}")
         raise HTTPException(status_code=500, detail="Failed to cancel registration")
 
+@api_router.get("/registrations/waitlist/my-waitlist", response_model=List[WaitlistEntry])
+async def get_my_waitlist(current_user: dict = Depends(require_role([UserRole.STUDENT]))):
+    entries = await db.waitlist.find({"student_id": current_user["sub"]}).sort("created_at", -1).to_list(1000)
+    positions = await asyncio.gather(*(waitlist_position(entry) for entry in entries))
+    return [WaitlistEntry(**entry, position=position) for entry, position in zip(entries, positions)]
+
+@api_router.delete("/registrations/waitlist/{event_id}")
+async def leave_waitlist(event_id: str, current_user: dict = Depends(require_role([UserRole.STUDENT]))):
+    """Leave an event's waitlist (student only)"""
+    result = await db.waitlist.delete_one({"event_id": event_id, "student_id": current_user["sub"]})
+    if not result.deleted_count:
+        raise HTTPException(status_code=404, detail="Not on the waitlist for this event")
+    await db.events.update_one({"id": event_id}, {"$inc": {"waitlist_count": -1}})
+    live_feed.nudge(event_id)
+    await event_changed(event_id)
+    return {"message": "Left the waitlist successfully"}
+
+@api_router.get("/registrations/event/{event_id}/waitlist", response_model=List[WaitlistEntry])
+async def get_event_waitlist(
+    event_id: str,
+    current_user: dict = Depends(require_role([UserRole.ORGANIZER]))
+):
+    await get_or_404(db.events, {"id": event_id, "organizer_id": current_user["sub"]}, "Event not found or access denied")
+    entries = await db.waitlist.find({"event_id": event_id}).sort("seq", 1).to_list(1000)
+    return [WaitlistEntry(**entry, position=position) for position, entry in enumerate(entries, start=1)]
+
 @api_router.get("/registrations/event/{event_id}", response_model=List[Registration])
 async def get_event_registrations(
     event_id: str,
@@ -338,30 +730,236 @@ async def get_event_registrations(
     registrations = await db.registrations.find({"event_id": event_id}).to_list(1000)
     return [Registration(**{**reg, "_id": str(reg["_id"])}) for reg in registrations]
 
+def roster_response(event_id: str, since: Optional[int] = None) -> StreamingResponse:
+    version = roster_version(datetime.utcnow())
+    return StreamingResponse(
+        gzip_ndjson(roster_records(db, event_id, version, since)),
+        media_type="application/x-ndjson",
+        headers={"Content-Encoding": "gzip", "Cache-Control": "no-store", "X-Roster-Version": str(version)},
+    )
+
+@api_router.get("/registrations/event/{event_id}/roster")
+async def download_event_roster(event_id: str, current_user: dict = Depends(require_role([UserRole.ORGANIZER]))):
+    """Gzipped NDJSON check-in roster for offline scanners.
+
+    The first line carries the roster ``version``; pass it to the changes
+    endpoint to catch up later. QR payloads are sent as hashes only.
+    """
+    if await event_organizer(event_id) != current_user["sub"]:
+        raise HTTPException(status_code=404, detail="Event not found or access denied")
+    return roster_response(event_id)
+
+@api_router.get("/registrations/event/{event_id}/roster/changes")
+async def get_event_roster_changes(
+    event_id: str,
+    since: int = Query(..., ge=0, description="Version from a previous roster or changes download"),
+    current_user: dict = Depends(require_role([UserRole.ORGANIZER]))
+):
+    """Registrations added or checked in, and removals, since ``since``"""
+    if await event_organizer(event_id) != current_user["sub"]:
+        raise HTTPException(status_code=404, detail="Event not found or access denied")
+    if since < roster_version(datetime.utcnow() - timedelta(days=ROSTER_TOMBSTONE_DAYS)):
+        raise HTTPException(status_code=410, detail="Roster version too old, download the full roster")
+    return roster_response(event_id, since)
+
 # ============= ATTENDANCE ROUTES =============
 @api_router.post("/attendance/mark")
 async def mark_attendance(
     attendance_data: AttendanceMarkRequest,
     current_user: dict = Depends(require_role([UserRole.ORGANIZER]))
 ):
-    registration = await db.registrations.find_one({"qr_code_data": attendance_data.qr_code_data})
-    if not registration:
-        raise HTTPException(status_code=404, detail="Invalid QR code")
+    """Mark attendance from a scanned QR code.
+
+    Answered from the event's in-memory check-in roster; the write itself is
+    batched in the background (see checkin.py). Signed tickets name their
+    event, legacy ``joinup-{id}`` payloads are looked up in loaded rosters
+    and then in the database.
+    """
+    qr = attendance_data.qr_code_data
+    ticket = verify_ticket(qr)
+    if ticket is not None:
+        event_id, registration_id = ticket.event_id, ticket.registration_id
+    else:
+        found = checkin_rosters.find_qr(qr)
+        if found:
+            event_id, registration_id = found[0].event_id, found[1].registration_id
+        else:
+            registration = await db.registrations.find_one({"qr_code_data": qr}, {"id": 1, "event_id": 1})
+            if not registration:
+                raise HTTPException(status_code=404, detail="Invalid QR code")
+            event_id, registration_id = registration["event_id"], registration["id"]
     
     # Verify organizer owns the event
-    event = await db.events.find_one({"id": registration["event_id"], "organizer_id": current_user["sub"]})
-    if not event:
+    if await event_organizer(event_id) != current_user["sub"]:
         raise HTTPException(status_code=403, detail="You don't have permission to mark attendance for this event")
     
-    if registration["attendance_marked"]:
+    roster = await checkin_rosters.get(db, event_id)
+    entry = await checkin_rosters.lookup(db, roster, registration_id)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Invalid QR code")
+    if ticket is not None and ticket_expired(ticket, roster.event_date):
+        raise HTTPException(status_code=400, detail="QR code expired")
+    if entry.attended:
         raise HTTPException(status_code=400, detail="Attendance already marked")
     
-    await db.registrations.update_one(
-        {"id": registration["id"]},
-        {"$set": {"attendance_marked": True, "attendance_time": datetime.utcnow()}}
-    )
+    if not await checkin_rosters.mark(db, event_id, entry, datetime.utcnow(), scopes=(f"organizer:{current_user['sub']}",)):
+        # Accepted meanwhile on another worker
+        raise HTTPException(status_code=400, detail="Attendance already marked")
+    live_feed.nudge(event_id)
+    return {"message": "Attendance marked successfully", "student_name": entry.student_name}
+
+@api_router.post("/attendance/checkin/{event_id}/open")
+async def open_checkin(event_id: str, current_user: dict = Depends(require_role([UserRole.ORGANIZER]))):
+    """Load the event's check-in roster before the doors open"""
+    if await event_organizer(event_id) != current_user["sub"]:
+        raise HTTPException(status_code=404, detail="Event not found or access denied")
+    checkin_rosters.invalidate(event_id)
+    roster = await checkin_rosters.get(db, event_id)
+    return {
+        "event_id": event_id,
+        "registrations": len(roster),
+        "attended": sum(entry.attended for entry in roster.by_id.values()),
+    }
+
+@api_router.post("/attendance/sync", response_model=AttendanceSyncResult)
+async def sync_attendance(
+    sync_data: AttendanceSyncRequest,
+    current_user: dict = Depends(require_role([UserRole.ORGANIZER]))
+):
+    """Apply a scanner's offline backlog in one round of writes.
+
+    Repeated codes count once (earliest scan wins); each registration is
+    marked with a conditional update tagged with this sync's id, so scans that
+    a concurrent sync or check-in wrote first are reported ``already_marked``
+    and never counted twice.
+    """
+    now = datetime.utcnow()
+    earliest = {}
+    for scan in sync_data.scans:
+        scanned_at = scan.scanned_at
+        if scanned_at.tzinfo is not None:
+            scanned_at = scanned_at.astimezone(timezone.utc).replace(tzinfo=None)
+        # Scanner clocks drift; never record attendance in the future
+        scanned_at = min(scanned_at, now)
+        if scan.qr_code_data not in earliest or scanned_at < earliest[scan.qr_code_data]:
+            earliest[scan.qr_code_data] = scanned_at
+    
+    statuses = {}
+    tickets = {}
+    legacy = []
+    for qr in earliest:
+        try:
+            ticket = verify_ticket(qr)
+        except HTTPException:
+            statuses[qr] = AttendanceScanStatus.INVALID
+            continue
+        if ticket is None:
+            legacy.append(qr)
+        else:
+            tickets[qr] = ticket
+    
+    lookup = []
+    if tickets:
+        lookup.append({"id": {"$in": [ticket.registration_id for ticket in tickets.values()]}})
+    if legacy:
+        lookup.append({"qr_code_data": {"$in": legacy}})
+    registrations = {}
+    if lookup:
+        async for reg in db.registrations.find(
+            {"$or": lookup},
+            {"_id": 0, "id": 1, "event_id": 1, "qr_code_data": 1, "student_id": 1, "student_name": 1, "attendance_marked": 1, "attendance_time": 1},
+        ):
+            registrations[reg["id"]] = reg
+    by_qr = {reg["qr_code_data"]: reg for reg in registrations.values()}
+    event_dates = {}
+    if tickets:
+        async for event in db.events.find(
+            {"id": {"$in": list({ticket.event_id for ticket in tickets.values()})}}, {"_id": 0, "id": 1, "date": 1}
+        ):
+            event_dates[event["id"]] = event.get("date")
+    
+    matched = {}
+    for qr in earliest:
+        if qr in statuses:
+            continue
+        ticket = tickets.get(qr)
+        reg = registrations.get(ticket.registration_id) if ticket else by_qr.get(qr)
+        if not reg or (ticket and reg["event_id"] != ticket.event_id):
+            statuses[qr] = AttendanceScanStatus.INVALID
+        elif await event_organizer(reg["event_id"]) != current_user["sub"]:
+            statuses[qr] = AttendanceScanStatus.FORBIDDEN
+        elif ticket and ticket_expired(ticket, event_dates.get(ticket.event_id)):
+            statuses[qr] = AttendanceScanStatus.EXPIRED
+        else:
+            matched[qr] = reg
+    
+    ops = []
+    marked = {}
+    sync_id = str(uuid.uuid4())
+    for qr, reg in matched.items():
+        # A registration can also arrive under both its signed and its legacy code
+        if reg.get("attendance_marked") or reg["id"] in marked or checkin_rosters.is_attended(reg["event_id"], reg["id"]):
+            statuses[qr] = AttendanceScanStatus.ALREADY_MARKED
+            continue
+        statuses[qr] = AttendanceScanStatus.MARKED
+        marked[reg["id"]] = qr
+        reg["attendance_time"] = earliest[qr]
+        ops.append(UpdateOne(
+            {"id": reg["id"], "attendance_marked": False},
+            {"$set": {"attendance_marked": True, "attendance_time": earliest[qr], "attendance_sync_id": sync_id, "roster_updated_at": now}},
+        ))
+    if ops:
+        result = await db.registrations.bulk_write(ops, ordered=False)
+        if result.modified_count < len(ops):
+            # Marked meanwhile by a concurrent sync or a check-in flush; report what they recorded
+            async for reg in db.registrations.find(
+                {"id": {"$in": list(marked)}, "attendance_sync_id": {"$ne": sync_id}},
+                {"_id": 0, "id": 1, "attendance_time": 1},
+            ):
+                qr = marked.pop(reg["id"])
+                statuses[qr] = AttendanceScanStatus.ALREADY_MARKED
+                matched[qr]["attendance_time"] = reg.get("attendance_time")
+    if marked:
+        await resource_versions.bump(
+            db,
+            f"organizer:{current_user['sub']}",
+            *(f"registrations:{matched[qr].get('student_id')}" for qr in marked.values()),
+        )
+        for qr in marked.values():
+            checkin_rosters.marked_elsewhere(matched[qr]["event_id"], matched[qr]["id"])
+            live_feed.nudge(matched[qr]["event_id"])
     
-    return {"message": "Attendance marked successfully", "student_name": registration["student_name"]}
+    results = []
+    seen = set()
+    for scan in sync_data.scans:
+        qr = scan.qr_code_data
+        reg = matched.get(qr, {})
+        results.append(AttendanceScanResult(
+            qr_code_data=qr,
+            status=AttendanceScanStatus.DUPLICATE if qr in seen else statuses[qr],
+            student_name=reg.get("student_name"),
+            attendance_time=reg.get("attendance_time"),
+        ))
+        seen.add(qr)
+    
+    logger.info(f"Attendance sync by {current_user['sub']}: {len(marked)} marked out of {len(sync_data.scans)} scans")
+    return AttendanceSyncResult(results=results, marked=len(marked))
+
+@api_router.get("/attendance/ticket-key/{event_id}")
+async def get_ticket_key(event_id: str, current_user: dict = Depends(require_role([UserRole.ORGANIZER]))):
+    """Per-event HMAC key so gate scanners can validate tickets offline.
+
+    ``expires_at`` follows the event's current date; the expiry inside a
+    ticket is the one at issue time and goes stale if the event is moved.
+    """
+    event = await get_or_404(db.events, {"id": event_id, "organizer_id": current_user["sub"]}, "Event not found or access denied")
+    return {
+        "event_id": event_id,
+        "format": f"{TICKET_PREFIX}.<base64url(registration_uuid[16] | event_uuid[16] | expires_at uint32 BE)>.<base64url(signature)>",
+        "algorithm": "HMAC-SHA256, first 16 bytes, over the text before the last '.'",
+        "key": base64.urlsafe_b64encode(event_ticket_key(event_id)).decode(),
+        "expires_at": ticket_expiry(event["date"]) if isinstance(event.get("date"), datetime) else None,
+    }
 
 # ============= CERTIFICATE ROUTES =============
 @api_router.post("/certificates/issue", response_model=Certificate)
@@ -378,7 +976,7 @@ async def issue_certificate(
     if not event:
         raise HTTPException(status_code=403, detail="Access denied")
     
-    if not registration["attendance_marked"]:
+    if not (registration["attendance_marked"] or checkin_rosters.is_attended(registration["event_id"], registration["id"])):
         raise HTTPException(status_code=400, detail="Cannot issue certificate - attendance not marked")
     
     if registration["certificate_issued"]:
@@ -386,11 +984,12 @@ async def issue_certificate(
         existing_cert = await db.certificates.find_one({"registration_id": cert_data.registration_id})
         if existing_cert:
             del existing_cert["_id"]
-            return Certificate(**existing_cert)
+            return Certificate(**await with_certificate_data(existing_cert))
     
     # Generate certificate
     event_date = event["date"].strftime("%B %d, %Y")
-    cert_pdf = generate_certificate_pdf(registration["student_name"], event["title"], event_date)
+    cert_pdf = await generate_certificate_pdf_async(registration["student_name"], event["title"], event_date)
+    certificate_key = await blob_store.put(base64.b64decode(cert_pdf))
     
     cert_dict = {
         "id": str(uuid.uuid4()),
@@ -400,7 +999,7 @@ async def issue_certificate(
         "event_id": registration["event_id"],
         "event_title": registration["event_title"],
         "issued_date": datetime.utcnow(),
-        "certificate_data": cert_pdf
+        "certificate_key": certificate_key
     }
     
     await db.certificates.insert_one(cert_dict)
@@ -408,85 +1007,94 @@ async def issue_certificate(
         {"id": cert_data.registration_id},
         {"$set": {"certificate_issued": True}}
     )
+    await resource_versions.bump(db, f"registrations:{registration['student_id']}", f"certificates:{registration['student_id']}")
     
     del cert_dict["_id"]
-    return Certificate(**cert_dict)
+    return Certificate(**cert_dict, certificate_data=cert_pdf)
 
-@api_router.get("/certificates/my-certificates", response_model=List[Certificate])
+@api_router.post("/certificates/issue/event/{event_id}", response_model=CertificateJob, status_code=status.HTTP_202_ACCEPTED)
+async def issue_event_certificates(
+    event_id: str,
+    current_user: dict = Depends(require_role([UserRole.ORGANIZER]))
+):
+    """Issue certificates to every attendee of the event in the background.
+
+    Returns the job (the one already in progress, if any); poll
+    GET /certificates/jobs/{job_id} for progress and failures.
+    """
+    event = await get_or_404(db.events, {"id": event_id, "organizer_id": current_user["sub"]}, "Event not found or access denied")
+    job = await create_certificate_job(db, blob_store, event)
+    return CertificateJob(**job)
+
+@api_router.get("/certificates/jobs/{job_id}", response_model=CertificateJob)
+async def get_certificate_job(job_id: str, current_user: dict = Depends(require_role([UserRole.ORGANIZER]))):
+    job = await get_or_404(db.certificate_jobs, {"id": job_id, "organizer_id": current_user["sub"]}, "Job not found")
+    return CertificateJob(**job)
+
+@api_router.get("/certificates/my-certificates", response_model=List[CertificateSummary])
 async def get_my_certificates(current_user: dict = Depends(require_role([UserRole.STUDENT]))):
-    certificates = await db.certificates.find({"student_id": current_user["sub"]}).sort("issued_date", -1).to_list(1000)
-    return [Certificate(**{**cert, "_id": str(cert["_id"])}) for cert in certificates]
+    certificates = await db.certificates.find(
+        {"student_id": current_user["sub"]}, CERTIFICATE_LIST_PROJECTION
+    ).sort("issued_date", -1).to_list(1000)
+    return [CertificateSummary(**cert) for cert in certificates]
+
+@api_router.get("/certificates/{certificate_id}", response_model=Certificate)
+async def get_certificate(certificate_id: str, current_user: dict = Depends(require_role([UserRole.STUDENT]))):
+    """Full certificate including the PDF (student owner only)"""
+    certificate = await get_or_404(
+        db.certificates, {"id": certificate_id, "student_id": current_user["sub"]}, "Certificate not found"
+    )
+    del certificate["_id"]
+    return Certificate(**await with_certificate_data(certificate))
+
+@api_router.get("/certificates/{certificate_id}/download")
+async def download_certificate(
+    certificate_id: str,
+    request: Request,
+    current_user: dict = Depends(require_role([UserRole.STUDENT]))
+):
+    """Stream the certificate PDF from the blob store (student owner only)"""
+    certificate = await get_or_404(
+        db.certificates, {"id": certificate_id, "student_id": current_user["sub"]}, "Certificate not found"
+    )
+    if certificate.get("certificate_data"):
+        # Not migrated to the blob store yet
+        return Response(content=base64.b64decode(certificate["certificate_data"]), media_type="application/pdf")
+    if not certificate.get("certificate_key"):
+        raise HTTPException(status_code=404, detail="Certificate file not found")
+    return await stream_blob(
+        request, blob_store, certificate["certificate_key"], "application/pdf",
+        filename=f"certificate-{certificate_id}.pdf"
+    )
 
 # ============= DASHBOARD ROUTES =============
 @api_router.get("/dashboard/student", response_model=StudentDashboard)
 async def get_student_dashboard(current_user: dict = Depends(require_role([UserRole.STUDENT]))):
-    registrations = await db.registrations.find({"student_id": current_user["sub"]}).to_list(1000)
-    
-    total_events = len(registrations)
-    attended_events = sum(1 for reg in registrations if reg["attendance_marked"])
-    certificates_earned = sum(1 for reg in registrations if reg["certificate_issued"])
-    
-    # Upcoming events (not attended yet and event date is in future)
-    upcoming = 0
-    for reg in registrations:
-        if not reg["attendance_marked"]:
-            event = await db.events.find_one({"id": reg["event_id"]})
-            if event and event["date"] > datetime.utcnow():
-                upcoming += 1
-    
-    return StudentDashboard(
-        total_events_registered=total_events,
-        attended_events=attended_events,
-        certificates_earned=certificates_earned,
-        upcoming_events=upcoming
-    )
+    result = await db.registrations.aggregate(
+        student_dashboard_pipeline(current_user["sub"], datetime.utcnow())
+    ).to_list(1)
+    if not result:
+        return StudentDashboard(total_events_registered=0, attended_events=0, certificates_earned=0, upcoming_events=0)
+    return StudentDashboard(**result[0])
 
 @api_router.get("/dashboard/organizer", response_model=OrganizerAnalytics)
 async def get_organizer_analytics(current_user: dict = Depends(require_role([UserRole.ORGANIZER]))):
-    events = await db.events.find({"organizer_id": current_user["sub"]}).to_list(1000)
-    
-    total_events = len(events)
-    total_registrations = sum(event["current_registrations"] for event in events)
-    
-    # Count attendees
-    total_attendees = 0
-    for event in events:
-        attendees = await db.registrations.count_documents({
-            "event_id": event["id"],
-            "attendance_marked": True
-        })
-        total_attendees += attendees
-    
-    # Count upcoming vs past events
-    now = datetime.utcnow()
-    upcoming_events = sum(1 for event in events if event["date"] > now)
-    past_events = total_events - upcoming_events
-    
-    # Calculate average rating
-    total_rating = sum(event.get("average_rating", 0) * event.get("total_ratings", 0) for event in events)
-    total_rating_count = sum(event.get("total_ratings", 0) for event in events)
-    average_rating = total_rating / total_rating_count if total_rating_count > 0 else 0.0
-    
-    # Get top events by registrations
-    sorted_events = sorted(events, key=lambda x: x["current_registrations"], reverse=True)[:5]
-    top_events = [
-        {
-            "id": event["id"],
-            "title": event["title"],
-            "registrations": event["current_registrations"],
-            "rating": event.get("average_rating", 0)
-        }
-        for event in sorted_events
-    ]
+    result = await db.events.aggregate(
+        organizer_analytics_pipeline(current_user["sub"], datetime.utcnow())
+    ).to_list(1)
+    summary = result[0]["summary"][0] if result and result[0]["summary"] else {}
+    total_events = summary.get("total_events", 0)
+    rating_count = summary.get("rating_count", 0)
+    average_rating = summary.get("rating_sum", 0) / rating_count if rating_count > 0 else 0.0
     
     return OrganizerAnalytics(
         total_events=total_events,
-        total_registrations=total_registrations,
-        total_attendees=total_attendees,
-        upcoming_events=upcoming_events,
-        past_events=past_events,
+        total_registrations=summary.get("total_registrations", 0),
+        total_attendees=summary.get("total_attendees", 0),
+        upcoming_events=summary.get("upcoming_events", 0),
+        past_events=total_events - summary.get("upcoming_events", 0),
         average_rating=round(average_rating, 2),
-        top_events=top_events
+        top_events=result[0]["top_events"] if result else []
     )
 
 # ============= RATING & FEEDBACK ROUTES =============
@@ -533,14 +1141,17 @@ async def create_rating(
     
     await db.ratings.insert_one(rating_dict)
     
-    # Update event average rating
-    all_ratings = await db.ratings.find({"event_id": rating_data.event_id}).to_list(1000)
-    avg_rating = sum(r["rating"] for r in all_ratings) / len(all_ratings)
-    
-    await db.events.update_one(
+    # Fold the rating into the event's running aggregates
+    event = await db.events.find_one_and_update(
         {"id": rating_data.event_id},
-        {"$set": {"average_rating": round(avg_rating, 2), "total_ratings": len(all_ratings)}}
+        add_rating_update(rating_data.rating),
+        projection={"average_rating": 1},
+        return_document=ReturnDocument.AFTER,
     )
+    if event:
+        candidate_index.set_rating(rating_data.event_id, event.get("average_rating"))
+    recommendation_cache.invalidate_candidates()
+    await event_changed(rating_data.event_id)
     
     del rating_dict["_id"]
     return Rating(**rating_dict)
@@ -551,65 +1162,52 @@ async def get_event_ratings(event_id: str, current_user: dict = Depends(get_curr
     return [Rating(**{**rating, "_id": str(rating["_id"])}) for rating in ratings]
 
 # ============= RECOMMENDATIONS =============
-@api_router.get("/recommendations", response_model=List[Event])
+@api_router.get("/recommendations", response_model=List[EventSummary])
 async def get_recommendations(current_user: dict = Depends(require_role([UserRole.STUDENT]))):
-    # Get student's registrations to understand preferences
-    registrations = await db.registrations.find({"student_id": current_user["sub"]}).to_list(1000)
+    """Top 10 upcoming events, cached per student (see recommendation_cache)"""
+    cached = recommendation_cache.get(current_user["sub"])
+    if cached is not None:
+        return cached
+    
+    token = recommendation_cache.begin()
+    started = time.perf_counter()
+    recommended = await compute_recommendations(current_user["sub"])
+    recommendation_cache.put(current_user["sub"], recommended, token, time.perf_counter() - started)
+    return recommended
+
+async def compute_recommendations(student_id: str) -> List[EventSummary]:
+    """Co-registration neighbours first, then the vectorized heuristic score"""
+    registrations = await db.registrations.find({"student_id": student_id}, {"event_id": 1}).to_list(1000)
     registered_event_ids = [reg["event_id"] for reg in registrations]
     
-    # Get events student registered for
-    registered_events = []
-    for event_id in registered_event_ids:
-        event = await db.events.find_one({"id": event_id})
-        if event:
-            registered_events.append(event)
+    # Categories of the registered events and the student's college, fetched together
+    registered_events, student, neighbor_docs, _ = await asyncio.gather(
+        db.events.find({"id": {"$in": registered_event_ids}}, {"category": 1}).to_list(None),
+        db.users.find_one({"id": student_id}, {"college": 1}),
+        db.event_neighbors.find({"event_id": {"$in": registered_event_ids}}, {"neighbors": 1}).to_list(None),
+        candidate_index.ensure_loaded(db),
+    )
     
-    # Extract preferred categories
     preferred_categories = {}
     for event in registered_events:
         category = event.get("category", "General")
         preferred_categories[category] = preferred_categories.get(category, 0) + 1
+    student_college = (student or {}).get("college", "")
     
-    # Get student's college for local events priority
-    student = await db.users.find_one({"id": current_user["sub"]})
-    student_college = student.get("college", "")
-    
-    # Get all upcoming events not yet registered
-    all_events = await db.events.find({
-        "id": {"$nin": registered_event_ids},
-        "date": {"$gt": datetime.utcnow()}
-    }).to_list(1000)
-    
-    # Score events based on multiple factors
-    scored_events = []
-    for event in all_events:
-        score = 0
-        
-        # Category preference (40% weight)
-        category = event.get("category", "General")
-        if category in preferred_categories:
-            score += 40 * (preferred_categories[category] / len(registered_events))
-        
-        # Same college (30% weight)
-        if event.get("college") == student_college:
-            score += 30
-        
-        # Rating (20% weight)
-        avg_rating = event.get("average_rating", 0)
-        score += 20 * (avg_rating / 5.0)
-        
-        # Popularity (10% weight)
-        registrations_count = event.get("current_registrations", 0)
-        if registrations_count > 0:
-            score += 10 * min(registrations_count / 50.0, 1.0)
-        
-        scored_events.append((score, event))
-    
-    # Sort by score and return top 10
-    scored_events.sort(key=lambda x: x[0], reverse=True)
-    recommended_events = [event for score, event in scored_events[:10]]
-    
-    return [Event(**{**event, "_id": str(event["_id"])}) for event in recommended_events]
+    # Merge the precomputed neighbour lists of the student's events ...
+    now = datetime.utcnow()
+    recommended_ids = [
+        event_id
+        for event_id, _ in merge_neighbor_lists((doc["neighbors"] for doc in neighbor_docs), registered_event_ids)
+        if candidate_index.is_upcoming(event_id, now)
+    ][:10]
+    # ... and fill the rest (cold start, few co-registrations) from the heuristic
+    recommended_ids += candidate_index.top_k(
+        preferred_categories, student_college, registered_event_ids + recommended_ids, now, k=10 - len(recommended_ids)
+    )
+    events = await db.events.find({"id": {"$in": recommended_ids}}, EVENT_LIST_PROJECTION).to_list(len(recommended_ids))
+    by_id = {event["id"]: event for event in events}
+    return [EventSummary(**by_id[event_id]) for event_id in recommended_ids if event_id in by_id]
 
 # ============= ADMIN ROUTES =============
 @api_router.get("/admin/users", response_model=List[User])
@@ -622,10 +1220,10 @@ async def get_all_users(current_user: dict = Depends(require_role([UserRole.ADMI
         result.append(User(**user))
     return result
 
-@api_router.get("/admin/events", response_model=List[Event])
+@api_router.get("/admin/events", response_model=List[EventSummary])
 async def get_all_events_admin(current_user: dict = Depends(require_role([UserRole.ADMIN]))):
-    events = await db.events.find().sort("created_at", -1).to_list(1000)
-    return [Event(**{**event, "_id": str(event["_id"])}) for event in events]
+    events = await db.events.find({}, EVENT_LIST_PROJECTION).sort("created_at", -1).to_list(1000)
+    return [EventSummary(**event) for event in events]
 
 # Include the router in the main app
 app.include_router(api_router)
@@ -636,6 +1234,21 @@ async def health_check():
     """Health check endpoint"""
     return {"status": "healthy", "service": "JoinUp API"}
 
+@app.get("/metrics")
+async def get_metrics():
+    """Runtime metrics for in-process executors and caches"""
+    return {
+        "cpu_executor": cpu_executor.metrics(),
+        "token_cache": token_cache.stats(),
+        "recommendations": candidate_index.stats(),
+        "recommendation_cache": recommendation_cache.stats(),
+        "qr_cache": qr_cache.stats(),
+        "checkin": checkin_rosters.stats(),
+        "live_feed": live_feed.stats(),
+        "events_response_cache": response_cache.stats(),
+        "etags": resource_versions.stats(),
+    }
+
 @app.on_event("startup")
 async def startup_db_client():
     """Initialize database connection on startup"""
@@ -644,9 +1257,25 @@ async def startup_db_client():
         logger.info("MongoDB connection established")
     except Exception as e:
         logger.error(f"Failed to connect to MongoDB: {str(e)}")
+    # Periodic reload picks up event changes made by other workers
+    app.state.recommender_refresh = asyncio.create_task(candidate_index.refresh_forever(db))
+    app.state.neighbors_refresh = asyncio.create_task(refresh_neighbors_forever(db))
+    # Picks up bulk certificate jobs left behind by a restart or a dead worker
+    app.state.certificate_jobs_resume = asyncio.create_task(resume_certificate_jobs_forever(db, blob_store))
+    # Writes attendance accepted by mark_attendance in batches
+    app.state.checkin_flush = asyncio.create_task(checkin_rosters.flush_forever(db))
 
 @app.on_event("shutdown")
 async def shutdown_db_client():
     """Close database connection on shutdown"""
+    app.state.recommender_refresh.cancel()
+    app.state.neighbors_refresh.cancel()
+    app.state.certificate_jobs_resume.cancel()
+    app.state.checkin_flush.cancel()
+    try:
+        await checkin_rosters.drain(db)
+    except Exception as e:
+        logger.error(f"Failed to flush pending attendance on shutdown: {str(e)}")
     client.close()
+    cpu_executor.shutdown()
     logger.info("MongoDB connection closed")
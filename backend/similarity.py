@@ -0,0 +1,142 @@
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Tuple
+import asyncio
+import logging
+import os
+
+import numpy as np
+from pymongo import ReplaceOne
+from pymongo.errors import DuplicateKeyError
+from scipy import sparse
+
+from executor import cpu_executor
+
+logger = logging.getLogger(__name__)
+
+NEIGHBORS_PER_EVENT = int(os.environ.get("SIMILARITY_NEIGHBORS", "20"))
+SIMILARITY_REFRESH_SECONDS = float(os.environ.get("SIMILARITY_REFRESH_SECONDS", "3600"))
+BATCH_SIZE = 500
+
+
+def compute_neighbors(student_codes: np.ndarray, event_codes: np.ndarray, n_students: int, n_events: int, top_n: int) -> List[List[Tuple[int, float]]]:
+    """Top-``top_n`` cosine neighbours for every event of a student×event matrix.
+
+    Takes the matrix as COO coordinates so it can run in the process pool;
+    returns ``(neighbour_code, score)`` lists indexed by event code.
+    """
+    matrix = sparse.csr_matrix(
+        (np.ones(len(event_codes), dtype=np.float32), (student_codes, event_codes)),
+        shape=(n_students, n_events),
+    )
+    matrix.data[:] = 1.0  # duplicate pairs would otherwise be summed
+
+    co_registrations = (matrix.T @ matrix).tocsr()
+    degrees = co_registrations.diagonal()
+    co_registrations.setdiag(0)
+    co_registrations.eliminate_zeros()
+
+    # cosine(i, j) = co(i, j) / sqrt(deg(i) * deg(j))
+    rows = np.repeat(np.arange(n_events), np.diff(co_registrations.indptr))
+    co_registrations.data /= np.sqrt(degrees[rows] * degrees[co_registrations.indices])
+
+    neighbors = []
+    for event in range(n_events):
+        start, end = co_registrations.indptr[event], co_registrations.indptr[event + 1]
+        scores = co_registrations.data[start:end]
+        columns = co_registrations.indices[start:end]
+        if len(scores) > top_n:
+            top = np.argpartition(-scores, top_n - 1)[:top_n]
+            scores, columns = scores[top], columns[top]
+        order = np.argsort(-scores, kind="stable")
+        neighbors.append([(int(columns[i]), float(scores[i])) for i in order])
+    return neighbors
+
+
+async def build_event_neighbors(pairs: Iterable[Tuple[str, str]], top_n: int = NEIGHBORS_PER_EVENT) -> Dict[str, List[dict]]:
+    """Neighbour lists keyed by event id from ``(student_id, event_id)`` pairs"""
+    students: Dict[str, int] = {}
+    events: Dict[str, int] = {}
+    student_codes, event_codes = [], []
+    for student_id, event_id in pairs:
+        student_codes.append(students.setdefault(student_id, len(students)))
+        event_codes.append(events.setdefault(event_id, len(events)))
+    if not events:
+        return {}
+
+    neighbors = await cpu_executor.run_task(
+        "event_neighbors",
+        compute_neighbors,
+        np.array(student_codes, dtype=np.int32),
+        np.array(event_codes, dtype=np.int32),
+        len(students),
+        len(events),
+        top_n,
+    )
+    event_ids = list(events)
+    return {
+        event_ids[code]: [{"event_id": event_ids[other], "score": round(score, 4)} for other, score in neighbors[code]]
+        for code in range(len(event_ids))
+    }
+
+
+async def rebuild_event_neighbors(db, top_n: int = NEIGHBORS_PER_EVENT) -> int:
+    """Recompute ``event_neighbors`` from every registration; returns events written"""
+    started = datetime.utcnow()
+    pairs = [
+        (reg["student_id"], reg["event_id"])
+        async for reg in db.registrations.find({}, {"_id": 0, "student_id": 1, "event_id": 1})
+    ]
+    neighbors = await build_event_neighbors(pairs, top_n)
+
+    ops = []
+    for event_id, event_neighbors in neighbors.items():
+        ops.append(ReplaceOne(
+            {"event_id": event_id},
+            {"event_id": event_id, "neighbors": event_neighbors, "updated_at": started},
+            upsert=True,
+        ))
+        if len(ops) >= BATCH_SIZE:
+            await db.event_neighbors.bulk_write(ops, ordered=False)
+            ops = []
+    if ops:
+        await db.event_neighbors.bulk_write(ops, ordered=False)
+    # Events that lost all their registrations since the last run
+    await db.event_neighbors.delete_many({"updated_at": {"$lt": started}})
+    return len(neighbors)
+
+
+async def acquire_lease(db, name: str, seconds: float) -> bool:
+    """Let only one worker run a periodic job per lease period"""
+    now = datetime.utcnow()
+    try:
+        await db.jobs.find_one_and_update(
+            {"_id": name, "$or": [{"locked_until": {"$lte": now}}, {"locked_until": {"$exists": False}}]},
+            {"$set": {"locked_until": now + timedelta(seconds=seconds)}},
+            upsert=True,
+        )
+        return True
+    except DuplicateKeyError:
+        # Another worker holds the lease
+        return False
+
+
+async def refresh_neighbors_forever(db, interval: float = SIMILARITY_REFRESH_SECONDS):
+    while True:
+        try:
+            if await acquire_lease(db, "event_neighbors", interval):
+                count = await rebuild_event_neighbors(db)
+                logger.info(f"Rebuilt co-registration neighbours for {count} events")
+        except Exception as e:
+            logger.error(f"Failed to rebuild event neighbours: {str(e)}")
+        await asyncio.sleep(interval)
+
+
+def merge_neighbor_lists(neighbor_lists: Iterable[List[dict]], exclude_ids: Iterable[str]) -> List[Tuple[str, float]]:
+    """Sum neighbour scores across the student's events, best first"""
+    exclude = set(exclude_ids)
+    scores: Dict[str, float] = {}
+    for neighbors in neighbor_lists:
+        for neighbor in neighbors:
+            if neighbor["event_id"] not in exclude:
+                scores[neighbor["event_id"]] = scores.get(neighbor["event_id"], 0.0) + neighbor["score"]
+    return sorted(scores.items(), key=lambda item: item[1], reverse=True)
@@ -0,0 +1,98 @@
+from datetime import datetime, timedelta
+from typing import NamedTuple, Optional
+import base64
+import calendar
+import hashlib
+import hmac
+import os
+import struct
+import uuid
+
+from fastapi import HTTPException, status
+
+from auth import SECRET_KEY
+
+QR_TICKET_SECRET = os.environ.get("QR_TICKET_SECRET", SECRET_KEY).encode()
+# Tickets stay valid this long after the event starts
+QR_TICKET_GRACE_HOURS = float(os.environ.get("QR_TICKET_GRACE_HOURS", 24))
+# Expiry for tickets whose event date is unknown
+QR_TICKET_DEFAULT_TTL_DAYS = float(os.environ.get("QR_TICKET_DEFAULT_TTL_DAYS", 365))
+
+TICKET_PREFIX = "jt1"
+SIGNATURE_BYTES = 16
+# registration id (16-byte UUID), event id (16-byte UUID), expiry (uint32 epoch seconds)
+TICKET_LAYOUT = struct.Struct(">16s16sI")
+
+
+class Ticket(NamedTuple):
+    registration_id: str
+    event_id: str
+    expires_at: int
+
+
+def _b64encode(data: bytes) -> str:
+    return base64.urlsafe_b64encode(data).rstrip(b"=").decode()
+
+
+def _b64decode(value: str) -> bytes:
+    return base64.urlsafe_b64decode(value + "=" * (-len(value) % 4))
+
+
+def event_ticket_key(event_id: str) -> bytes:
+    """Per-event HMAC key, so a scanner can verify one event's tickets but not forge others"""
+    return hmac.new(QR_TICKET_SECRET, f"qr-ticket:{event_id}".encode(), hashlib.sha256).digest()
+
+
+def _sign(event_id: str, message: str) -> bytes:
+    return hmac.new(event_ticket_key(event_id), message.encode(), hashlib.sha256).digest()[:SIGNATURE_BYTES]
+
+
+def ticket_expiry(event_date: Optional[datetime]) -> datetime:
+    if isinstance(event_date, datetime):
+        return event_date + timedelta(hours=QR_TICKET_GRACE_HOURS)
+    return datetime.utcnow() + timedelta(days=QR_TICKET_DEFAULT_TTL_DAYS)
+
+
+def issue_ticket(registration_id: str, event_id: str, expires_at: datetime) -> str:
+    """``jt1.<payload>.<signature>``, compact enough for a low-density QR code"""
+    payload = TICKET_LAYOUT.pack(
+        uuid.UUID(registration_id).bytes,
+        uuid.UUID(event_id).bytes,
+        calendar.timegm(expires_at.utctimetuple()),
+    )
+    message = f"{TICKET_PREFIX}.{_b64encode(payload)}"
+    return f"{message}.{_b64encode(_sign(event_id, message))}"
+
+
+def verify_ticket(token: str) -> Optional[Ticket]:
+    """Decode and check a signed ticket without touching the database.
+
+    Returns None for legacy (unsigned) QR payloads and raises 404 for forged
+    or malformed tickets. Expiry is checked separately (``ticket_expired``)
+    against the event's current date.
+    """
+    if not token.startswith(f"{TICKET_PREFIX}."):
+        return None
+    try:
+        message, signature = token.rsplit(".", 1)
+        registration_bytes, event_bytes, expires_at = TICKET_LAYOUT.unpack(_b64decode(message.split(".", 1)[1]))
+        ticket = Ticket(str(uuid.UUID(bytes=registration_bytes)), str(uuid.UUID(bytes=event_bytes)), expires_at)
+        valid = hmac.compare_digest(_b64decode(signature), _sign(ticket.event_id, message))
+    except (IndexError, ValueError, struct.error):
+        valid = False
+    if not valid:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Invalid QR code")
+    return ticket
+
+
+def ticket_expired(ticket: Ticket, event_date: Optional[datetime], now: Optional[datetime] = None) -> bool:
+    """Whether the ticket's event is over.
+
+    Follows the event's current date, so tickets survive the event being
+    rescheduled; the expiry baked in at issue time is only used when the
+    date is unknown.
+    """
+    now = now or datetime.utcnow()
+    if isinstance(event_date, datetime):
+        return now > ticket_expiry(event_date)
+    return ticket.expires_at < calendar.timegm(now.utctimetuple())
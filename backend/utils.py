@@ -1,35 +1,61 @@
 import qrcode
+import qrcode.image.svg
 from io import BytesIO
 import base64
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.lib.units import inch
 from reportlab.pdfgen import canvas
 from reportlab.lib import colors
+from reportlab.lib.rl_accel import escapePDF
+from reportlab.pdfbase import pdfmetrics
 from datetime import datetime
 import uuid
+import os
+import re
+import threading
 
-def generate_qr_code(data: str) -> str:
-    """Generate QR code and return as base64 string"""
+from cache import LRUCache
+from executor import cpu_executor
+
+QR_IMAGE_FORMATS = {"png": "image/png", "svg": "image/svg+xml"}
+
+def generate_qr_image(data: str, image_format: str = "png") -> bytes:
+    """Render a QR code as PNG or SVG bytes"""
     qr = qrcode.QRCode(
         version=1,
         error_correction=qrcode.constants.ERROR_CORRECT_L,
         box_size=10,
         border=4,
+        image_factory=qrcode.image.svg.SvgPathImage if image_format == "svg" else None,
     )
     qr.add_data(data)
     qr.make(fit=True)
     
-    img = qr.make_image(fill_color="black", back_color="white")
     buffered = BytesIO()
-    img.save(buffered, format="PNG")
-    img_str = base64.b64encode(buffered.getvalue()).decode()
-    return img_str
+    if image_format == "svg":
+        qr.make_image().save(buffered)
+    else:
+        img = qr.make_image(fill_color="black", back_color="white")
+        img.save(buffered, format="PNG")
+    return buffered.getvalue()
 
-def generate_certificate_pdf(student_name: str, event_title: str, event_date: str) -> str:
-    """Generate certificate PDF and return as base64 string"""
-    buffer = BytesIO()
-    c = canvas.Canvas(buffer, pagesize=A4)
-    width, height = A4
+def generate_qr_code(data: str) -> str:
+    """Generate QR code and return as base64 string"""
+    return base64.b64encode(generate_qr_image(data)).decode()
+
+async def generate_qr_code_async(data: str) -> str:
+    return await cpu_executor.run_task("qr_code", generate_qr_code, data)
+
+# Static layout of a certificate; the student-specific parts are overlaid per PDF
+CERTIFICATE_PAGE_SIZE = A4
+CERTIFICATE_NAME_FONT = ("Helvetica-Bold", 24)
+CERTIFICATE_NAME_COLOR = colors.HexColor('#EC407A')
+CERTIFICATE_FOOTER_FONT = ("Helvetica", 10)
+CERTIFICATE_TEMPLATE_CACHE_SIZE = int(os.environ.get("CERTIFICATE_TEMPLATE_CACHE_SIZE", "64"))
+
+def _draw_certificate_layout(c, event_title: str, event_date: str):
+    """Everything on a certificate that is the same for all attendees of an event"""
+    width, height = CERTIFICATE_PAGE_SIZE
     
     # Draw border
     c.setStrokeColor(colors.HexColor('#5E35B1'))
@@ -56,11 +82,6 @@ def generate_certificate_pdf(student_name: str, event_title: str, event_date: st
     c.setFillColor(colors.black)
     c.drawCentredString(width/2, height-3.5*inch, "This is to certify that")
     
-    # Student name
-    c.setFont("Helvetica-Bold", 24)
-    c.setFillColor(colors.HexColor('#EC407A'))
-    c.drawCentredString(width/2, height-4.2*inch, student_name)
-    
     # Event details
     c.setFont("Helvetica", 14)
     c.setFillColor(colors.black)
@@ -78,17 +99,116 @@ def generate_certificate_pdf(student_name: str, event_title: str, event_date: st
     # Footer
     c.setFont("Helvetica-Oblique", 10)
     c.drawCentredString(width/2, 1.5*inch, "Generated by JoinUp - Digital Event Platform")
-    
-    # Issue date
-    c.setFont("Helvetica", 10)
-    c.drawString(inch, inch, f"Issued: {datetime.now().strftime('%B %d, %Y')}")
-    
-    # Certificate ID
-    cert_id = str(uuid.uuid4())[:8].upper()
-    c.drawRightString(width-inch, inch, f"Certificate ID: {cert_id}")
-    
+
+def _certificate_student_lines(student_name: str, issued: str, certificate_id: str) -> list:
+    """(text, font, size, color, x, y, align) of the per-student parts"""
+    width, height = CERTIFICATE_PAGE_SIZE
+    return [
+        (student_name, *CERTIFICATE_NAME_FONT, CERTIFICATE_NAME_COLOR, width/2, height-4.2*inch, "centre"),
+        (f"Issued: {issued}", *CERTIFICATE_FOOTER_FONT, colors.black, inch, inch, "left"),
+        (f"Certificate ID: {certificate_id}", *CERTIFICATE_FOOTER_FONT, colors.black, width-inch, inch, "right"),
+    ]
+
+def _text_x(text: str, font: str, size: float, x: float, align: str) -> float:
+    if align == "left":
+        return x
+    text_width = pdfmetrics.stringWidth(text, font, size)
+    return x - text_width / 2 if align == "centre" else x - text_width
+
+def render_certificate_pdf(student_name: str, event_title: str, event_date: str, issued: str, certificate_id: str) -> bytes:
+    """Draw a complete certificate with ReportLab (no template cache)"""
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=CERTIFICATE_PAGE_SIZE)
+    _draw_certificate_layout(c, event_title, event_date)
+    for text, font, size, color, x, y, align in _certificate_student_lines(student_name, issued, certificate_id):
+        c.setFont(font, size)
+        c.setFillColor(color)
+        c.drawString(_text_x(text, font, size, x, align), y, text)
     c.save()
-    pdf_data = buffer.getvalue()
-    buffer.close()
-    
-    return base64.b64encode(pdf_data).decode()
+    return buffer.getvalue()
+
+class CertificateTemplate:
+    """An event's certificate layout rendered once, with per-student overlays.
+
+    Each certificate is the cached template PDF plus an incremental update
+    that appends one content stream (name, issue date, certificate ID) to the
+    page, so nothing of the static layout is redrawn or re-serialized.
+    """
+
+    def __init__(self, event_title: str, event_date: str):
+        buffer = BytesIO()
+        c = canvas.Canvas(buffer, pagesize=CERTIFICATE_PAGE_SIZE, pageCompression=1)
+        _draw_certificate_layout(c, event_title, event_date)
+        c.save()
+        pdf = buffer.getvalue()
+        self.pdf = pdf if pdf.endswith(b"\n") else pdf + b"\n"
+
+        page = re.search(rb"(\d+) 0 obj\n<<\n/Contents (\d+) 0 R (.*?)>>\nendobj", pdf, re.DOTALL)
+        self.page_number = int(page.group(1))
+        self.page_object = b"%d 0 obj\n<<\n/Contents [ %s 0 R %%d 0 R ] %s>>\nendobj\n" % (
+            self.page_number, page.group(2), page.group(3).replace(b"%", b"%%")
+        )
+        self.fonts = {
+            name.decode(): resource.decode()
+            for name, resource in re.findall(rb"/BaseFont /([\w-]+) /Encoding /WinAnsiEncoding /Name /(F\d+)", pdf)
+        }
+        self.size = int(re.search(rb"/Size (\d+)", pdf).group(1))
+        self.root = int(re.search(rb"/Root (\d+) 0 R", pdf).group(1))
+        self.info = int(re.search(rb"/Info (\d+) 0 R", pdf).group(1))
+        self.startxref = int(re.findall(rb"startxref\n(\d+)", pdf)[-1])
+
+    def _text_ops(self, text: str, font: str, size: float, color, x: float, y: float, align: str) -> bytes:
+        # Characters outside WinAnsi (which ReportLab would substitute) become "?"
+        encoded = b"".join(
+            chunk if f.fontName == font else b"?" * len(chunk)
+            for f, chunk in pdfmetrics.unicode2T1(text, [pdfmetrics.getFont(font)])
+        )
+        r, g, b = color.rgb()
+        x = _text_x(text, font, size, x, align)
+        return (
+            f"{r:.4f} {g:.4f} {b:.4f} rg BT /{self.fonts[font]} {size} Tf "
+            f"1 0 0 1 {x:.3f} {y:.3f} Tm ({escapePDF(encoded)}) Tj ET\n"
+        ).encode("latin-1")
+
+    def render(self, student_name: str, issued: str, certificate_id: str) -> bytes:
+        ops = b"".join(
+            self._text_ops(*line) for line in _certificate_student_lines(student_name, issued, certificate_id)
+        )
+        content = self.size
+        out = bytearray(self.pdf)
+        content_offset = len(out)
+        out += b"%d 0 obj\n<<\n/Length %d\n>>\nstream\n%s\nendstream\nendobj\n" % (content, len(ops), ops)
+        page_offset = len(out)
+        out += self.page_object % content
+        xref_offset = len(out)
+        out += b"xref\n0 1\n0000000000 65535 f \n%d 1\n%010d 00000 n \n%d 1\n%010d 00000 n \n" % (
+            self.page_number, page_offset, content, content_offset
+        )
+        out += b"trailer\n<<\n/Info %d 0 R\n/Prev %d\n/Root %d 0 R\n/Size %d\n>>\nstartxref\n%d\n%%%%EOF\n" % (
+            self.info, self.startxref, self.root, content + 1, xref_offset
+        )
+        return bytes(out)
+
+_certificate_templates = LRUCache(maxsize=CERTIFICATE_TEMPLATE_CACHE_SIZE)
+_certificate_templates_lock = threading.Lock()  # thread-pool executors share the cache
+
+def certificate_template(event_title: str, event_date: str) -> CertificateTemplate:
+    """Cached template per event (per process when rendering in a process pool)"""
+    key = (event_title, event_date)
+    with _certificate_templates_lock:
+        template = _certificate_templates.get(key)
+    if template is None:
+        template = CertificateTemplate(event_title, event_date)
+        with _certificate_templates_lock:
+            _certificate_templates.set(key, template)
+    return template
+
+def generate_certificate_pdf(student_name: str, event_title: str, event_date: str) -> str:
+    """Generate certificate PDF and return as base64 string"""
+    issued = datetime.now().strftime('%B %d, %Y')
+    certificate_id = str(uuid.uuid4())[:8].upper()
+    pdf = certificate_template(event_title, event_date).render(student_name, issued, certificate_id)
+    return base64.b64encode(pdf).decode()
+
+async def generate_certificate_pdf_async(student_name: str, event_title: str, event_date: str) -> str:
+    return await cpu_executor.run_task("certificate_pdf", generate_certificate_pdf, student_name, event_title, event_date)
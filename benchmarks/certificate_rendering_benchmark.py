@@ -0,0 +1,52 @@
+#!/usr/bin/env python3
+"""
+Certificate Rendering Benchmark
+Certificates per second on one core: full ReportLab rendering of every
+certificate versus the cached per-event template with a per-student overlay.
+No database needed.
+"""
+
+import base64
+import os
+from pathlib import Path
+import sys
+import time
+import uuid
+
+# Add backend to path for imports
+sys.path.append(str(Path(__file__).parent.parent / 'backend'))
+
+from utils import generate_certificate_pdf, render_certificate_pdf
+
+CERTIFICATES = int(os.environ.get('BENCH_CERTIFICATES', 500))
+EVENT_TITLE = 'Tech Fest 2025'
+EVENT_DATE = 'March 15, 2025'
+ISSUED = 'March 16, 2025'
+
+
+def full_render(student_name: str) -> str:
+    """The previous implementation: every certificate drawn from scratch"""
+    pdf = render_certificate_pdf(student_name, EVENT_TITLE, EVENT_DATE, ISSUED, str(uuid.uuid4())[:8].upper())
+    return base64.b64encode(pdf).decode()
+
+
+def template_render(student_name: str) -> str:
+    return generate_certificate_pdf(student_name, EVENT_TITLE, EVENT_DATE)
+
+
+def run_benchmark():
+    names = [f"Student Number {i}" for i in range(CERTIFICATES)]
+    print(f"{'impl':<10} {'certs/s/core':>13} {'ms/cert':>9} {'avg KB':>8}")
+    for name, fn in (('full', full_render), ('template', template_render)):
+        fn(names[0])  # warm up fonts and the template cache
+        start = time.process_time()
+        sizes = [len(fn(student)) for student in names]
+        elapsed = time.process_time() - start
+        print(f"{name:<10} {CERTIFICATES / elapsed:>13.0f} {elapsed / CERTIFICATES * 1000:>9.3f} {sum(sizes) / len(sizes) * 3 / 4 / 1024:>8.1f}")
+
+
+if __name__ == "__main__":
+    print("="*50)
+    print("JoinUp Certificate Rendering Benchmark")
+    print("="*50)
+    run_benchmark()
@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""
+Event Search Benchmark
+Compares the old unanchored $regex search against $text and prefix search
+at 10k / 100k / 1M events. Uses a scratch database (joinup_bench by default).
+"""
+
+import asyncio
+from motor.motor_asyncio import AsyncIOMotorClient
+import os
+from pathlib import Path
+from dotenv import load_dotenv
+import uuid
+from datetime import datetime, timedelta
+import random
+import statistics
+import sys
+import time
+
+# Add backend to path for imports
+sys.path.append(str(Path(__file__).parent.parent / 'backend'))
+
+from search import event_search_filter, normalize_title, text_search_pipeline
+
+# Load environment variables
+ROOT_DIR = Path(__file__).parent.parent / 'backend'
+load_dotenv(ROOT_DIR / '.env')
+
+mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
+db_name = os.environ.get('BENCH_DB_NAME', 'joinup_bench')
+
+SIZES = [10_000, 100_000, 1_000_000]
+BATCH_SIZE = 10_000
+REPEATS = 20
+PAGE_SIZE = 100
+QUERIES = ['hackathon', 'robotics workshop', 'ha', 'zzzz-no-match']
+
+WORDS = [
+    'tech', 'fest', 'hackathon', 'sports', 'cultural', 'night', 'business', 'summit',
+    'music', 'concert', 'dance', 'coding', 'startup', 'expo', 'art', 'science',
+    'robotics', 'workshop', 'ai', 'conference', 'gaming', 'tournament', 'film', 'festival',
+]
+
+
+def make_event(now: datetime) -> dict:
+    title = ' '.join(random.choices(WORDS, k=3)).title()
+    return {
+        'id': str(uuid.uuid4()),
+        'title': title,
+        'title_lower': normalize_title(title),
+        'description': f"Join us for {' '.join(random.choices(WORDS, k=12))}.",
+        'date': now + timedelta(minutes=random.randint(-500_000, 500_000)),
+        'venue': 'Main Auditorium',
+        'fee': 0,
+        'college': 'MIT',
+        'category': 'Technology',
+        'current_registrations': 0,
+    }
+
+
+async def fill(db, target: int):
+    """Top the collection up to ``target`` documents"""
+    now = datetime.utcnow()
+    count = await db.events.estimated_document_count()
+    while count < target:
+        batch = min(BATCH_SIZE, target - count)
+        await db.events.insert_many([make_event(now) for _ in range(batch)], ordered=False)
+        count += batch
+
+
+async def time_query(run) -> tuple:
+    samples = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        await run()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+async def run_benchmark():
+    print(f"Connecting to MongoDB at {mongo_url}...")
+    client = AsyncIOMotorClient(mongo_url)
+    db = client[db_name]
+
+    try:
+        await client.admin.command('ping')
+        print(f"✓ Connected, using scratch database '{db_name}'\n")
+
+        await db.events.drop()
+        await db.events.create_index([("title", "text"), ("description", "text")])
+        await db.events.create_index([("date", 1), ("id", 1)])
+        await db.events.create_index("title_lower")
+
+        print(f"{'events':>10} {'query':<20} {'mode':<8} {'p50 ms':>9} {'p95 ms':>9}")
+        for size in SIZES:
+            await fill(db, size)
+            for q in QUERIES:
+                async def old_regex():
+                    await db.events.find({"$or": [
+                        {"title": {"$regex": q, "$options": "i"}},
+                        {"description": {"$regex": q, "$options": "i"}},
+                    ]}).to_list(PAGE_SIZE)
+
+                query, text_search = event_search_filter(q)
+
+                async def new_search():
+                    if text_search:
+                        await db.events.aggregate(text_search_pipeline(query, None, PAGE_SIZE, {"image": 0})).to_list(PAGE_SIZE + 1)
+                    else:
+                        await db.events.find(query).sort([("date", 1), ("id", 1)]).limit(PAGE_SIZE).to_list(PAGE_SIZE)
+
+                for mode, run in (('regex', old_regex), ('text' if text_search else 'prefix', new_search)):
+                    p50, p95 = await time_query(run)
+                    print(f"{size:>10} {q:<20} {mode:<8} {p50:>9.2f} {p95:>9.2f}")
+
+    finally:
+        await db.events.drop()
+        client.close()
+        print("\nConnection closed.")
+
+
+if __name__ == "__main__":
+    print("="*50)
+    print("JoinUp Event Search Benchmark")
+    print("="*50)
+    asyncio.run(run_benchmark())
@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Recommendation Hit-Rate Evaluation
+Offline leave-one-out comparison of the heuristic scorer, co-registration
+neighbours and the combination served by /api/recommendations. Reads the
+seeded database (DB_NAME, see database/seed_data.py) without modifying it.
+"""
+
+import asyncio
+from motor.motor_asyncio import AsyncIOMotorClient
+import os
+from pathlib import Path
+from dotenv import load_dotenv
+from datetime import datetime
+import sys
+
+# Add backend to path for imports
+sys.path.append(str(Path(__file__).parent.parent / 'backend'))
+
+from executor import cpu_executor
+from recommender import CANDIDATE_PROJECTION, CandidateIndex
+from similarity import build_event_neighbors, merge_neighbor_lists
+
+# Load environment variables
+ROOT_DIR = Path(__file__).parent.parent / 'backend'
+load_dotenv(ROOT_DIR / '.env')
+
+mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
+db_name = os.environ.get('DB_NAME', 'joinup')
+
+TOP_K = 10
+
+
+def heuristic(index: CandidateIndex, categories: dict, training: list, college: str) -> list:
+    preferred = {}
+    for event_id in training:
+        category = categories.get(event_id, "General")
+        preferred[category] = preferred.get(category, 0) + 1
+    # Past events are valid targets offline, so every event is a candidate
+    return index.top_k(preferred, college, training, datetime.min, k=TOP_K)
+
+
+def co_registration(neighbors: dict, training: list) -> list:
+    merged = merge_neighbor_lists((neighbors.get(event_id, []) for event_id in training), training)
+    return [event_id for event_id, _ in merged[:TOP_K]]
+
+
+async def run_evaluation():
+    print(f"Connecting to MongoDB at {mongo_url}...")
+    client = AsyncIOMotorClient(mongo_url)
+    db = client[db_name]
+
+    try:
+        await client.admin.command('ping')
+        print(f"✓ Connected, evaluating on '{db_name}'\n")
+
+        events = await db.events.find({}, CANDIDATE_PROJECTION).to_list(None)
+        colleges = {user["id"]: user.get("college", "") async for user in db.users.find({"role": "student"}, {"id": 1, "college": 1})}
+        registrations = await db.registrations.find(
+            {}, {"_id": 0, "student_id": 1, "event_id": 1, "created_at": 1}
+        ).sort("created_at", 1).to_list(None)
+
+        # Hold out each student's most recent registration
+        by_student = {}
+        for reg in registrations:
+            by_student.setdefault(reg["student_id"], []).append(reg["event_id"])
+        held_out = {sid: events_[-1] for sid, events_ in by_student.items() if len(events_) >= 2}
+        training_pairs = [
+            (sid, event_id)
+            for sid, events_ in by_student.items()
+            for event_id in (events_[:-1] if sid in held_out else events_)
+        ]
+        print(f"✓ {len(events)} events, {len(registrations)} registrations, {len(held_out)} students evaluated\n")
+
+        index = CandidateIndex()
+        index.load(events)
+        categories = {event["id"]: event.get("category", "General") for event in events}
+        neighbors = await build_event_neighbors(training_pairs)
+
+        hits = {"heuristic": 0, "co-registration": 0, "combined": 0}
+        for sid, target in held_out.items():
+            training = by_student[sid][:-1]
+            scored = heuristic(index, categories, training, colleges.get(sid, ""))
+            similar = co_registration(neighbors, training)
+            combined = similar + [event_id for event_id in scored if event_id not in similar]
+            hits["heuristic"] += target in scored
+            hits["co-registration"] += target in similar
+            hits["combined"] += target in combined[:TOP_K]
+
+        print(f"{'scorer':<16} {'hits':>6} {f'hit@{TOP_K}':>8}")
+        for name, count in hits.items():
+            rate = count / len(held_out) if held_out else 0.0
+            print(f"{name:<16} {count:>6} {rate:>8.3f}")
+
+    finally:
+        cpu_executor.shutdown()
+        client.close()
+        print("\nConnection closed.")
+
+
+if __name__ == "__main__":
+    print("="*50)
+    print("JoinUp Recommendation Hit-Rate Evaluation")
+    print("="*50)
+    asyncio.run(run_evaluation())
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+"""
+Student Dashboard Benchmark
+Compares the old per-registration event lookups against the single
+aggregation pipeline for students with 10 / 100 / 1000 registrations.
+Uses a scratch database (joinup_bench by default).
+"""
+
+import asyncio
+from motor.motor_asyncio import AsyncIOMotorClient
+import os
+from pathlib import Path
+from dotenv import load_dotenv
+import uuid
+from datetime import datetime, timedelta
+import random
+import statistics
+import sys
+import time
+
+# Add backend to path for imports
+sys.path.append(str(Path(__file__).parent.parent / 'backend'))
+
+from aggregations import student_dashboard_pipeline
+
+# Load environment variables
+ROOT_DIR = Path(__file__).parent.parent / 'backend'
+load_dotenv(ROOT_DIR / '.env')
+
+mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
+db_name = os.environ.get('BENCH_DB_NAME', 'joinup_bench')
+
+SIZES = [10, 100, 1000]
+REPEATS = 20
+
+
+async def old_dashboard(db, student_id: str) -> dict:
+    """The previous implementation: one find_one per unattended registration"""
+    registrations = await db.registrations.find({"student_id": student_id}).to_list(1000)
+    upcoming = 0
+    for reg in registrations:
+        if not reg["attendance_marked"]:
+            event = await db.events.find_one({"id": reg["event_id"]})
+            if event and event["date"] > datetime.utcnow():
+                upcoming += 1
+    return {
+        "total_events_registered": len(registrations),
+        "attended_events": sum(1 for reg in registrations if reg["attendance_marked"]),
+        "certificates_earned": sum(1 for reg in registrations if reg["certificate_issued"]),
+        "upcoming_events": upcoming,
+    }
+
+
+async def new_dashboard(db, student_id: str) -> dict:
+    result = await db.registrations.aggregate(student_dashboard_pipeline(student_id, datetime.utcnow())).to_list(1)
+    return result[0]
+
+
+async def seed_student(db, registrations: int) -> str:
+    student_id = str(uuid.uuid4())
+    now = datetime.utcnow()
+    events = [
+        {'id': str(uuid.uuid4()), 'title': 'Bench Event', 'date': now + timedelta(days=random.randint(-60, 60))}
+        for _ in range(registrations)
+    ]
+    await db.events.insert_many(events)
+    regs = []
+    for event in events:
+        attended = event['date'] < now and random.random() < 0.7
+        regs.append({
+            'id': str(uuid.uuid4()),
+            'student_id': student_id,
+            'event_id': event['id'],
+            'attendance_marked': attended,
+            'certificate_issued': attended and random.random() < 0.8,
+        })
+    await db.registrations.insert_many(regs)
+    return student_id
+
+
+async def time_it(fn, db, student_id: str) -> tuple:
+    samples = []
+    for _ in range(REPEATS):
+        start = time.perf_counter()
+        await fn(db, student_id)
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.95) - 1]
+
+
+async def run_benchmark():
+    print(f"Connecting to MongoDB at {mongo_url}...")
+    client = AsyncIOMotorClient(mongo_url)
+    db = client[db_name]
+
+    try:
+        await client.admin.command('ping')
+        print(f"✓ Connected, using scratch database '{db_name}'\n")
+
+        await client.drop_database(db_name)
+        await db.events.create_index("id", unique=True)
+        await db.registrations.create_index("student_id")
+
+        print(f"{'registrations':>14} {'impl':<10} {'p50 ms':>9} {'p95 ms':>9}")
+        for size in SIZES:
+            student_id = await seed_student(db, size)
+            assert await old_dashboard(db, student_id) == await new_dashboard(db, student_id)
+            for name, fn in (('n+1', old_dashboard), ('pipeline', new_dashboard)):
+                p50, p95 = await time_it(fn, db, student_id)
+                print(f"{size:>14} {name:<10} {p50:>9.2f} {p95:>9.2f}")
+
+    finally:
+        await client.drop_database(db_name)
+        client.close()
+        print("\nConnection closed.")
+
+
+if __name__ == "__main__":
+    print("="*50)
+    print("JoinUp Student Dashboard Benchmark")
+    print("="*50)
+    asyncio.run(run_benchmark())
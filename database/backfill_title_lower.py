@@ -0,0 +1,70 @@
+#!/usr/bin/env python3
+"""
+Title Search Field Backfill Script
+Sets title_lower on events stored before short prefix searches used it.
+"""
+
+import asyncio
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+import os
+from pathlib import Path
+from dotenv import load_dotenv
+import sys
+
+# Add backend to path for imports
+sys.path.append(str(Path(__file__).parent.parent / 'backend'))
+
+from search import normalize_title
+
+# Load environment variables
+ROOT_DIR = Path(__file__).parent.parent / 'backend'
+load_dotenv(ROOT_DIR / '.env')
+
+mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
+db_name = os.environ.get('DB_NAME', 'joinup')
+
+BATCH_SIZE = 500
+
+
+async def backfill_title_lower():
+    """Normalize the title of every event that has no title_lower yet"""
+    print(f"Connecting to MongoDB at {mongo_url}...")
+    client = AsyncIOMotorClient(mongo_url)
+    db = client[db_name]
+
+    try:
+        # Test connection
+        await client.admin.command('ping')
+        print("✓ Connected to MongoDB successfully\n")
+
+        ops = []
+        updated = 0
+        async for event in db.events.find({"title_lower": {"$exists": False}}, {"title": 1}):
+            ops.append(UpdateOne({"_id": event["_id"]}, {"$set": {"title_lower": normalize_title(event.get("title") or "")}}))
+            if len(ops) >= BATCH_SIZE:
+                await db.events.bulk_write(ops, ordered=False)
+                updated += len(ops)
+                ops = []
+        if ops:
+            await db.events.bulk_write(ops, ordered=False)
+            updated += len(ops)
+        print(f"✓ {updated} events updated\n")
+
+        print("="*50)
+        print("✓ Title search field backfilled!")
+        print("="*50)
+
+    except Exception as e:
+        print(f"\n✗ Error backfilling title_lower: {e}")
+        raise
+    finally:
+        client.close()
+        print("\nConnection closed.")
+
+
+if __name__ == "__main__":
+    print("="*50)
+    print("JoinUp Title Search Field Backfill")
+    print("="*50)
+    asyncio.run(backfill_title_lower())
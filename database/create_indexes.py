@@ -47,8 +47,12 @@ async def create_indexes():
         await db.events.create_index("category")
         await db.events.create_index("average_rating")
         await db.events.create_index("created_at")
+        # Compound index for keyset (cursor) pagination on GET /api/events
+        await db.events.create_index([("date", 1), ("id", 1)])
         # Compound index for search
         await db.events.create_index([("title", "text"), ("description", "text")])
+        # Short (1-2 character) searches: case-sensitive ^prefix on the normalized title
+        await db.events.create_index("title_lower")
         print("✓ Events indexes created")
         
         # REGISTRATIONS Collection Indexes
@@ -59,13 +63,35 @@ async def create_indexes():
         await db.registrations.create_index("qr_code_data", unique=True)
         await db.registrations.create_index("attendance_marked")
         await db.registrations.create_index("created_at")
+        # Compound index for per-event attendee counts (organizer analytics)
+        await db.registrations.create_index([("event_id", 1), ("attendance_marked", 1)])
         # Compound unique index to prevent duplicate registrations
         await db.registrations.create_index(
             [("student_id", 1), ("event_id", 1)],
             unique=True
         )
+        # Compound index for roster delta downloads (offline scanners)
+        await db.registrations.create_index([("event_id", 1), ("roster_updated_at", 1)])
         print("✓ Registrations indexes created")
         
+        # REGISTRATION TOMBSTONES Collection Indexes
+        print("\nCreating indexes for 'registration_tombstones' collection...")
+        await db.registration_tombstones.create_index([("event_id", 1), ("deleted_at", 1)])
+        # Kept as long as roster versions are accepted (ROSTER_TOMBSTONE_DAYS)
+        await db.registration_tombstones.create_index("deleted_at", expireAfterSeconds=30 * 24 * 3600)
+        print("✓ Registration tombstones indexes created")
+        
+        # WAITLIST Collection Indexes
+        print("\nCreating indexes for 'waitlist' collection...")
+        await db.waitlist.create_index("id", unique=True)
+        # Queue order per event: O(log n) enqueue and head-of-line promotion
+        await db.waitlist.create_index([("event_id", 1), ("seq", 1)], unique=True)
+        await db.waitlist.create_index(
+            [("student_id", 1), ("event_id", 1)],
+            unique=True
+        )
+        print("✓ Waitlist indexes created")
+        
         # CERTIFICATES Collection Indexes
         print("\nCreating indexes for 'certificates' collection...")
         await db.certificates.create_index("id", unique=True)
@@ -75,6 +101,18 @@ async def create_indexes():
         await db.certificates.create_index("issued_date")
         print("✓ Certificates indexes created")
         
+        # CERTIFICATE_JOBS Collection Indexes (bulk issuance)
+        print("\nCreating indexes for 'certificate_jobs' collection...")
+        await db.certificate_jobs.create_index("id", unique=True)
+        await db.certificate_jobs.create_index([("event_id", 1), ("status", 1)])
+        # At most one active job per event, even for concurrent requests
+        await db.certificate_jobs.create_index(
+            "event_id", unique=True, partialFilterExpression={"active": True}, name="event_id_active_unique"
+        )
+        # Resume scan for jobs whose worker went away
+        await db.certificate_jobs.create_index([("status", 1), ("lease_until", 1)])
+        print("✓ Certificate jobs indexes created")
+        
         # RATINGS Collection Indexes
         print("\nCreating indexes for 'ratings' collection...")
         await db.ratings.create_index("id", unique=True)
@@ -89,13 +127,31 @@ async def create_indexes():
         )
         print("✓ Ratings indexes created")
         
+        # EVENT_NEIGHBORS Collection Indexes (co-registration recommendations)
+        print("\nCreating indexes for 'event_neighbors' collection...")
+        await db.event_neighbors.create_index("event_id", unique=True)
+        await db.event_neighbors.create_index("updated_at")
+        print("✓ Event neighbors indexes created")
+        
+        # RESPONSE_CACHE Collection Indexes (RESPONSE_CACHE_BACKEND=mongodb)
+        print("\nCreating indexes for 'checkin_outbox' collection...")
+        await db.checkin_outbox.create_index("event_id")
+        # Replay scan for entries a dead worker never flushed
+        await db.checkin_outbox.create_index("queued_at")
+        print("✓ Check-in outbox indexes created")
+        
+        print("\nCreating indexes for 'response_cache' collection...")
+        await db.response_cache.create_index("tags")
+        await db.response_cache.create_index("expires_at", expireAfterSeconds=0)
+        print("✓ Response cache indexes created")
+        
         print("\n" + "="*50)
         print("✓ All indexes created successfully!")
         print("="*50)
         
         # List all indexes
         print("\nCreated indexes:")
-        for collection_name in ['users', 'events', 'registrations', 'certificates', 'ratings']:
+        for collection_name in ['users', 'events', 'registrations', 'registration_tombstones', 'waitlist', 'certificates', 'certificate_jobs', 'ratings', 'event_neighbors', 'response_cache', 'checkin_outbox']:
             indexes = await db[collection_name].list_indexes().to_list(None)
             print(f"\n{collection_name}:")
             for idx in indexes:
@@ -70,6 +70,7 @@ async def seed_data():
     event = {
         "id": event_id,
         "title": "Tech Fest 2025",
+        "title_lower": "tech fest 2025",
         "description": "Annual technology festival",
         "date": datetime.utcnow(),
         "venue": "Main Auditorium",
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+"""
+Blob Garbage Collection Script
+Deletes blobs no event image or certificate refers to any more (images
+replaced by an edit, blobs of deleted events). Blobs stored within the
+grace period are kept, as their documents may still be being written.
+"""
+
+import asyncio
+from motor.motor_asyncio import AsyncIOMotorClient
+from datetime import datetime, timedelta
+import os
+from pathlib import Path
+from dotenv import load_dotenv
+import sys
+
+# Add backend to path for imports
+sys.path.append(str(Path(__file__).parent.parent / 'backend'))
+
+# Load environment variables
+ROOT_DIR = Path(__file__).parent.parent / 'backend'
+load_dotenv(ROOT_DIR / '.env')
+
+from blobstore import create_blob_store, BLOB_STORE_BACKEND
+
+mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
+db_name = os.environ.get('DB_NAME', 'joinup')
+
+BATCH_SIZE = 500
+GRACE_PERIOD = timedelta(hours=float(os.environ.get('BLOB_GC_GRACE_HOURS', '24')))
+
+
+async def referenced_keys(db, keys: list) -> set:
+    """The subset of ``keys`` still used by an event or certificate"""
+    events, certificates = await asyncio.gather(
+        db.events.distinct("image_key", {"image_key": {"$in": keys}}),
+        db.certificates.distinct("certificate_key", {"certificate_key": {"$in": keys}}),
+    )
+    return set(events) | set(certificates)
+
+
+async def collect(db, blob_store, keys: list, cutoff: datetime) -> int:
+    unreferenced = set(keys) - await referenced_keys(db, keys)
+    for key in unreferenced:
+        # Skipped if the blob was stored again since it was listed
+        await blob_store.delete(key, cutoff)
+    return len(unreferenced)
+
+
+async def gc_blobs():
+    """Delete unreferenced blobs older than the grace period"""
+    print(f"Connecting to MongoDB at {mongo_url}...")
+    client = AsyncIOMotorClient(mongo_url)
+    db = client[db_name]
+    blob_store = create_blob_store(db)
+
+    try:
+        # Test connection
+        await client.admin.command('ping')
+        print(f"✓ Connected to MongoDB successfully (blob store: {BLOB_STORE_BACKEND})\n")
+
+        cutoff = datetime.utcnow() - GRACE_PERIOD
+        print(f"Collecting blobs stored before {cutoff.isoformat()}...")
+        checked = collected = 0
+        batch = []
+        async for key in blob_store.stored_before(cutoff):
+            batch.append(key)
+            if len(batch) >= BATCH_SIZE:
+                collected += await collect(db, blob_store, batch, cutoff)
+                checked += len(batch)
+                batch = []
+                print(f"  … {checked} checked, {collected} collected")
+        if batch:
+            collected += await collect(db, blob_store, batch, cutoff)
+            checked += len(batch)
+
+        print("="*50)
+        print(f"✓ {checked} blobs checked, {collected} unreferenced blobs collected")
+        print("="*50)
+
+    except Exception as e:
+        print(f"\n✗ Error collecting blobs: {e}")
+        raise
+    finally:
+        client.close()
+        print("\nConnection closed.")
+
+
+if __name__ == "__main__":
+    print("="*50)
+    print("JoinUp Blob Garbage Collection")
+    print("="*50)
+    asyncio.run(gc_blobs())
@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Blob Migration Script
+Moves inline base64 event images and certificate PDFs into the blob store
+(GridFS or filesystem, see BLOB_STORE_BACKEND). Safe to re-run: only
+documents that still carry inline data are touched.
+"""
+
+import asyncio
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+import os
+from pathlib import Path
+from dotenv import load_dotenv
+import base64
+import sys
+
+# Add backend to path for imports
+sys.path.append(str(Path(__file__).parent.parent / 'backend'))
+
+# Load environment variables
+ROOT_DIR = Path(__file__).parent.parent / 'backend'
+load_dotenv(ROOT_DIR / '.env')
+
+from blobstore import create_blob_store, decode_base64_blob, BLOB_STORE_BACKEND
+
+mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
+db_name = os.environ.get('DB_NAME', 'joinup')
+
+BATCH_SIZE = 100
+
+
+async def migrate_collection(collection, field: str, to_update) -> int:
+    """Move ``field`` of every document that still has it into the blob store"""
+    migrated = 0
+    ops = []
+    cursor = collection.find({field: {"$type": "string", "$ne": ""}}, {"id": 1, field: 1}).batch_size(BATCH_SIZE)
+    async for doc in cursor:
+        try:
+            update = await to_update(doc[field])
+        except Exception as e:
+            print(f"  ✗ Skipping {doc.get('id')}: {e}")
+            continue
+        ops.append(UpdateOne({"_id": doc["_id"]}, {"$set": update, "$unset": {field: ""}}))
+        if len(ops) >= BATCH_SIZE:
+            await collection.bulk_write(ops, ordered=False)
+            migrated += len(ops)
+            ops = []
+            print(f"  … {migrated} migrated")
+    if ops:
+        await collection.bulk_write(ops, ordered=False)
+        migrated += len(ops)
+    return migrated
+
+
+async def migrate_blobs():
+    """Migrate inline blobs to the configured blob store"""
+    print(f"Connecting to MongoDB at {mongo_url}...")
+    client = AsyncIOMotorClient(mongo_url)
+    db = client[db_name]
+    blob_store = create_blob_store(db)
+
+    try:
+        # Test connection
+        await client.admin.command('ping')
+        print(f"✓ Connected to MongoDB successfully (blob store: {BLOB_STORE_BACKEND})\n")
+
+        async def event_image(value: str) -> dict:
+            data, content_type = decode_base64_blob(value)
+            return {"image_key": await blob_store.put(data), "image_content_type": content_type}
+
+        async def certificate_pdf(value: str) -> dict:
+            return {"certificate_key": await blob_store.put(base64.b64decode(value))}
+
+        print("Migrating event images...")
+        count = await migrate_collection(db.events, "image", event_image)
+        print(f"✓ {count} event images migrated\n")
+
+        print("Migrating certificate PDFs...")
+        count = await migrate_collection(db.certificates, "certificate_data", certificate_pdf)
+        print(f"✓ {count} certificates migrated\n")
+
+        print("="*50)
+        print("✓ Blob migration complete!")
+        print("="*50)
+
+    except Exception as e:
+        print(f"\n✗ Error migrating blobs: {e}")
+        raise
+    finally:
+        client.close()
+        print("\nConnection closed.")
+
+
+if __name__ == "__main__":
+    print("="*50)
+    print("JoinUp Blob Migration")
+    print("="*50)
+    asyncio.run(migrate_blobs())
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Rating Aggregates Repair Script
+Rebuilds rating_sum, rating_count, rating_histogram, total_ratings and
+average_rating on every event from the ratings collection in bulk.
+"""
+
+import asyncio
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+import os
+from pathlib import Path
+from dotenv import load_dotenv
+import sys
+
+# Add backend to path for imports
+sys.path.append(str(Path(__file__).parent.parent / 'backend'))
+
+from aggregations import rating_aggregates_fields, rating_aggregates_pipeline
+
+# Load environment variables
+ROOT_DIR = Path(__file__).parent.parent / 'backend'
+load_dotenv(ROOT_DIR / '.env')
+
+mongo_url = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
+db_name = os.environ.get('DB_NAME', 'joinup')
+
+BATCH_SIZE = 500
+
+
+async def repair_ratings():
+    """Recompute rating aggregates for all events"""
+    print(f"Connecting to MongoDB at {mongo_url}...")
+    client = AsyncIOMotorClient(mongo_url)
+    db = client[db_name]
+
+    try:
+        # Test connection
+        await client.admin.command('ping')
+        print("✓ Connected to MongoDB successfully\n")
+
+        print("Aggregating ratings...")
+        groups = {}
+        async for group in db.ratings.aggregate(rating_aggregates_pipeline(), allowDiskUse=True):
+            groups[group["_id"]] = group
+        print(f"✓ {len(groups)} rated events found")
+
+        # Every event is rewritten, so events whose ratings were deleted are reset too
+        ops = []
+        repaired = 0
+        async for event in db.events.find({}, {"id": 1}):
+            fields = rating_aggregates_fields(groups.get(event["id"], {}))
+            ops.append(UpdateOne({"_id": event["_id"]}, {"$set": fields}))
+            if len(ops) >= BATCH_SIZE:
+                await db.events.bulk_write(ops, ordered=False)
+                repaired += len(ops)
+                ops = []
+        if ops:
+            await db.events.bulk_write(ops, ordered=False)
+            repaired += len(ops)
+        print(f"✓ {repaired} events repaired\n")
+
+        print("="*50)
+        print("✓ Rating aggregates rebuilt!")
+        print("="*50)
+
+    except Exception as e:
+        print(f"\n✗ Error repairing ratings: {e}")
+        raise
+    finally:
+        client.close()
+        print("\nConnection closed.")
+
+
+if __name__ == "__main__":
+    print("="*50)
+    print("JoinUp Rating Aggregates Repair")
+    print("="*50)
+    asyncio.run(repair_ratings())
@@ -6,6 +6,7 @@ Populates the database with sample data for development and testing
 
 import asyncio
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
 import os
 from pathlib import Path
 from dotenv import load_dotenv
@@ -17,7 +18,10 @@ import sys
 # Add backend to path for imports
 sys.path.append(str(Path(__file__).parent.parent / 'backend'))
 
-from auth import get_password_hash
+from auth import get_password_hash_async
+from aggregations import rating_aggregates_fields, rating_aggregates_pipeline
+from executor import cpu_executor
+from search import normalize_title
 
 # Load environment variables
 ROOT_DIR = Path(__file__).parent.parent / 'backend'
@@ -71,7 +75,7 @@ async def seed_database():
             user = {
                 'id': admin_id,
                 'email': f'admin{i+1}@joinup.com',
-                'password': get_password_hash('admin123'),
+                'password': 'admin123',
                 'name': f'Admin {i+1}',
                 'role': 'admin',
                 'college': 'JoinUp HQ',
@@ -90,7 +94,7 @@ async def seed_database():
             user = {
                 'id': student_id,
                 'email': f'{first.lower()}.{last.lower()}{i}@student.com',
-                'password': get_password_hash('student123'),
+                'password': 'student123',
                 'name': f'{first} {last}',
                 'role': 'student',
                 'college': college,
@@ -109,7 +113,7 @@ async def seed_database():
             user = {
                 'id': organizer_id,
                 'email': f'organizer{i+1}@{college.lower().replace(" ", "")}.com',
-                'password': get_password_hash('organizer123'),
+                'password': 'organizer123',
                 'name': f'{college} Event Team',
                 'role': 'organizer',
                 'college': college,
@@ -120,6 +124,11 @@ async def seed_database():
             users.append(user)
             user_ids['organizers'].append(organizer_id)
         
+        # Hash all passwords in parallel on the CPU executor
+        hashes = await asyncio.gather(*(get_password_hash_async(u['password']) for u in users))
+        for user, hashed in zip(users, hashes):
+            user['password'] = hashed
+        
         await db.users.insert_many(users)
         print(f"✓ Created {len(users)} users (3 admins, 20 students, 8 organizers)\n")
         
@@ -153,6 +162,7 @@ async def seed_database():
                 'total_ratings': 0,
                 'created_at': datetime.utcnow() - timedelta(days=random.randint(1, 45))
             }
+            event['title_lower'] = normalize_title(event['title'])
             events.append(event)
             event_ids.append(event_id)
         
@@ -240,18 +250,12 @@ async def seed_database():
             await db.ratings.insert_many(ratings)
             print(f"✓ Created {len(ratings)} ratings\n")
         
-        # Update event average ratings
-        for event in events:
-            event_ratings = [r for r in ratings if r['event_id'] == event['id']]
-            if event_ratings:
-                avg_rating = sum(r['rating'] for r in event_ratings) / len(event_ratings)
-                await db.events.update_one(
-                    {'id': event['id']},
-                    {'$set': {
-                        'average_rating': round(avg_rating, 2),
-                        'total_ratings': len(event_ratings)
-                    }}
-                )
+        # Update event rating aggregates
+        groups = {g['_id']: g async for g in db.ratings.aggregate(rating_aggregates_pipeline())}
+        await db.events.bulk_write([
+            UpdateOne({'id': event['id']}, {'$set': rating_aggregates_fields(groups.get(event['id'], {}))})
+            for event in events
+        ])
         
         # Print summary
         print("="*50)
@@ -276,6 +280,7 @@ async def seed_database():
         raise
     finally:
         client.close()
+        cpu_executor.shutdown()
         print("\nConnection closed.")
 
 
@@ -0,0 +1,53 @@
+"""
+Certificate PDF tests
+CertificateTemplate appends each student's text to a cached ReportLab PDF as
+a hand-written incremental update; parse the result with a real PDF reader
+so a change in ReportLab's output layout fails here instead of in the field.
+"""
+
+import sys
+from io import BytesIO
+from pathlib import Path
+
+from pypdf import PdfReader
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'backend'))
+
+from utils import CertificateTemplate, render_certificate_pdf
+
+EVENT_TITLE = "Tech Fest 2025"
+EVENT_DATE = "March 15, 2025"
+ISSUED = "March 16, 2025"
+
+
+def _text(pdf: bytes) -> str:
+    reader = PdfReader(BytesIO(pdf), strict=True)
+    assert len(reader.pages) == 1
+    return reader.pages[0].extract_text()
+
+
+def test_template_render_is_readable():
+    pdf = CertificateTemplate(EVENT_TITLE, EVENT_DATE).render("Jane Doe", ISSUED, "AB12CD34")
+    text = _text(pdf)
+    for expected in ("Jane Doe", f"Issued: {ISSUED}", "Certificate ID: AB12CD34", EVENT_TITLE, EVENT_DATE):
+        assert expected in text
+
+
+def test_template_matches_full_render():
+    template = CertificateTemplate(EVENT_TITLE, EVENT_DATE).render("Jane Doe", ISSUED, "AB12CD34")
+    full = render_certificate_pdf("Jane Doe", EVENT_TITLE, EVENT_DATE, ISSUED, "AB12CD34")
+    assert sorted(_text(template).split()) == sorted(_text(full).split())
+
+
+def test_renders_are_independent():
+    template = CertificateTemplate(EVENT_TITLE, EVENT_DATE)
+    first = _text(template.render("Jane Doe", ISSUED, "AB12CD34"))
+    second = _text(template.render("John Roe", ISSUED, "EF56GH78"))
+    assert "John Roe" in second and "EF56GH78" in second
+    assert "Jane Doe" not in second and "AB12CD34" not in second
+    assert "John Roe" not in first
+
+
+def test_special_characters():
+    text = _text(CertificateTemplate(EVENT_TITLE, EVENT_DATE).render("Zoë (O'Neil) \\ Smith", ISSUED, "AB12CD34"))
+    assert "Zoë (O'Neil) \\ Smith" in text
@@ -0,0 +1,128 @@
+"""
+Registration concurrency tests
+Fires thousands of simultaneous registrations at one event against a scratch
+MongoDB database (TEST_DB_NAME, default joinup_test) and checks for overselling.
+"""
+
+import asyncio
+import os
+import sys
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import httpx
+import pytest
+from motor.motor_asyncio import AsyncIOMotorClient
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'backend'))
+
+import server_old
+from auth import create_access_token
+
+MONGO_URL = os.environ.get('MONGO_URL', 'mongodb://localhost:27017')
+TEST_DB_NAME = os.environ.get('TEST_DB_NAME', 'joinup_test')
+STUDENTS = 2000
+CAPACITY = 50
+
+
+async def _mongo_available() -> bool:
+    client = AsyncIOMotorClient(MONGO_URL, serverSelectionTimeoutMS=1000)
+    try:
+        await client.admin.command('ping')
+        return True
+    except Exception:
+        return False
+    finally:
+        client.close()
+
+
+pytestmark = pytest.mark.skipif(
+    not asyncio.run(_mongo_available()), reason=f"MongoDB not reachable at {MONGO_URL}"
+)
+
+
+async def _setup(db, students: int, capacity: int) -> tuple:
+    await db.client.drop_database(TEST_DB_NAME)
+    await db.registrations.create_index([("student_id", 1), ("event_id", 1)], unique=True)
+    await db.registrations.create_index("qr_code_data", unique=True)
+
+    event_id = str(uuid.uuid4())
+    await db.events.insert_one({
+        "id": event_id,
+        "title": "Flash Crowd Fest",
+        "description": "Concurrency test event",
+        "date": datetime.utcnow() + timedelta(days=7),
+        "venue": "Main Auditorium",
+        "fee": 0,
+        "college": "MIT",
+        "category": "Technology",
+        "max_participants": capacity,
+        "organizer_id": str(uuid.uuid4()),
+        "organizer_name": "Test Organizer",
+        "current_registrations": 0,
+    })
+
+    student_ids = [str(uuid.uuid4()) for _ in range(students)]
+    await db.users.insert_many([
+        {"id": sid, "email": f"{sid}@student.com", "name": f"Student {i}", "role": "student", "college": "MIT"}
+        for i, sid in enumerate(student_ids)
+    ])
+    return event_id, student_ids
+
+
+async def _register(http, event_id: str, student_id: str) -> httpx.Response:
+    token = create_access_token({"sub": student_id, "role": "student"})
+    return await http.post(
+        "/api/registrations",
+        json={"event_id": event_id},
+        headers={"Authorization": f"Bearer {token}"},
+    )
+
+
+def _run(coro_fn, monkeypatch):
+    async def runner():
+        client = AsyncIOMotorClient(MONGO_URL)
+        db = client[TEST_DB_NAME]
+        monkeypatch.setattr(server_old, "db", db)
+        transport = httpx.ASGITransport(app=server_old.app)
+        try:
+            async with httpx.AsyncClient(transport=transport, base_url="http://test") as http:
+                return await coro_fn(db, http)
+        finally:
+            await client.drop_database(TEST_DB_NAME)
+            client.close()
+    return asyncio.run(runner())
+
+
+def test_flash_crowd_never_oversells(monkeypatch):
+    async def scenario(db, http):
+        event_id, student_ids = await _setup(db, STUDENTS, CAPACITY)
+        responses = await asyncio.gather(*(_register(http, event_id, sid) for sid in student_ids))
+
+        accepted = [r for r in responses if r.status_code == 200]
+        rejected = [r for r in responses if r.status_code == 400]
+        assert len(accepted) == CAPACITY
+        assert len(rejected) == STUDENTS - CAPACITY
+        assert all(r.json()["detail"] == "Event is full" for r in rejected)
+
+        event = await db.events.find_one({"id": event_id})
+        assert event["current_registrations"] == CAPACITY
+        assert await db.registrations.count_documents({"event_id": event_id}) == CAPACITY
+
+    _run(scenario, monkeypatch)
+
+
+def test_duplicate_burst_registers_once(monkeypatch):
+    async def scenario(db, http):
+        event_id, (student_id,) = await _setup(db, 1, CAPACITY)
+        responses = await asyncio.gather(*(_register(http, event_id, student_id) for _ in range(200)))
+
+        assert sum(r.status_code == 200 for r in responses) == 1
+        assert all(r.status_code in (200, 400) for r in responses)
+
+        event = await db.events.find_one({"id": event_id})
+        assert event["current_registrations"] == 1
+        assert await db.registrations.count_documents({"event_id": event_id}) == 1
+
+    _run(scenario, monkeypatch)
@@ -0,0 +1,95 @@
+"""
+Signed QR ticket tests
+Round-trips tickets through issue_ticket/verify_ticket and checks that forged,
+foreign, expired and malformed payloads are rejected. No database needed.
+"""
+
+import base64
+import hashlib
+import hmac
+import sys
+import uuid
+from datetime import datetime, timedelta
+from pathlib import Path
+
+import pytest
+from fastapi import HTTPException
+
+sys.path.insert(0, str(Path(__file__).parent.parent / 'backend'))
+
+from tickets import SIGNATURE_BYTES, TICKET_PREFIX, event_ticket_key, issue_ticket, ticket_expired, ticket_expiry, verify_ticket
+
+EVENT_DATE = datetime(2030, 5, 1, 10, 0)
+
+
+def _ticket(event_id: str = None, registration_id: str = None, event_date: datetime = EVENT_DATE) -> tuple:
+    event_id = event_id or str(uuid.uuid4())
+    registration_id = registration_id or str(uuid.uuid4())
+    return event_id, registration_id, issue_ticket(registration_id, event_id, ticket_expiry(event_date))
+
+
+def _assert_invalid(token: str):
+    with pytest.raises(HTTPException) as exc:
+        verify_ticket(token)
+    assert exc.value.status_code == 404
+
+
+def test_round_trip():
+    event_id, registration_id, token = _ticket()
+    assert token.startswith(f"{TICKET_PREFIX}.")
+    ticket = verify_ticket(token)
+    assert ticket.event_id == event_id
+    assert ticket.registration_id == registration_id
+    assert not ticket_expired(ticket, EVENT_DATE, now=EVENT_DATE)
+
+
+def test_forged_signature():
+    _, _, token = _ticket()
+    message, signature = token.rsplit(".", 1)
+    forged = ("A" if signature[0] != "A" else "B") + signature[1:]
+    _assert_invalid(f"{message}.{forged}")
+
+
+def test_tampered_payload():
+    _, _, token = _ticket()
+    _, payload, signature = token.split(".")
+    tampered = payload[:-2] + ("AA" if payload[-2:] != "AA" else "BB")
+    _assert_invalid(f"{TICKET_PREFIX}.{tampered}.{signature}")
+
+
+def test_wrong_event_key():
+    # A scanner holding one event's key cannot mint tickets for another event
+    event_id, _, _ = _ticket()
+    _, _, other = _ticket()
+    message = other.rsplit(".", 1)[0]
+    signature = hmac.new(event_ticket_key(event_id), message.encode(), hashlib.sha256).digest()[:SIGNATURE_BYTES]
+    _assert_invalid(f"{message}.{base64.urlsafe_b64encode(signature).rstrip(b'=').decode()}")
+
+
+def test_expired_ticket():
+    _, _, token = _ticket()
+    ticket = verify_ticket(token)
+    assert ticket_expired(ticket, EVENT_DATE, now=EVENT_DATE + timedelta(days=2))
+
+
+def test_expiry_follows_rescheduled_event():
+    _, _, token = _ticket()
+    ticket = verify_ticket(token)
+    moved = EVENT_DATE + timedelta(days=30)
+    assert not ticket_expired(ticket, moved, now=EVENT_DATE + timedelta(days=2))
+    assert ticket_expired(ticket, None, now=EVENT_DATE + timedelta(days=2))
+
+
+@pytest.mark.parametrize("token", [
+    f"{TICKET_PREFIX}.",
+    f"{TICKET_PREFIX}.abc",
+    f"{TICKET_PREFIX}.abc.def",
+    f"{TICKET_PREFIX}.!!!.???",
+    f"{TICKET_PREFIX}.{'A' * 48}.{'A' * 22}",
+])
+def test_malformed(token):
+    _assert_invalid(token)
+
+
+def test_legacy_payload_is_not_a_ticket():
+    assert verify_ticket(f"joinup-{uuid.uuid4()}") is None